@@ -13,14 +13,15 @@ from os.path import (
     expanduser,
     dirname,
     curdir,
-    commonpath,
 )
 import shutil
-import json
-import re
+import heapq
+from operator import attrgetter
 import uuid
+from subprocess import CalledProcessError
+from contextlib import contextmanager
 from urllib.parse import ParseResult, urlparse
-from typing import Any, Iterable, Optional, List, Dict, Tuple, cast
+from typing import Any, Iterable, Iterator, Optional, List, Dict, Set, Tuple, cast
 
 assert Dict  # make pyflakes happy
 
@@ -35,6 +36,7 @@ from dataworkspaces.utils.git_utils import (
     git_init,
     git_add,
     is_git_dirty,
+    cached_git_queries,
     is_pull_needed_from_remote,
     GIT_EXE_PATH,
     set_remote_origin,
@@ -43,8 +45,10 @@ from dataworkspaces.utils.git_utils import (
     git_remove_subtree,
     get_branch_info,
     ensure_entry_in_gitignore,
+    strip_gitignore_slashes,
     echo_git_status_for_user,
-    switch_git_branch_if_needed
+    switch_git_branch_if_needed,
+    commit_changes_in_repo_subdirs,
 )
 from dataworkspaces.utils.git_fat_utils import (
     validate_git_fat_in_path_if_needed,
@@ -59,7 +63,12 @@ from dataworkspaces.utils.git_lfs_utils import (
     is_a_git_lfs_repo,
     ensure_git_lfs_configured_if_needed,
 )
-from dataworkspaces.utils.file_utils import safe_rename, get_subpath_from_absolute
+from dataworkspaces.utils.file_utils import (
+    safe_rename,
+    get_subpath_from_absolute,
+    write_file_atomically,
+)
+from dataworkspaces.utils.json_utils import load_json_file, dumps as json_dumps
 from dataworkspaces.utils.param_utils import (
     HOSTNAME,
     init_scratch_directory,
@@ -87,6 +96,12 @@ SNAPSHOT_DIR_PATH = ".dataworkspace/snapshots"
 SNAPSHOT_METADATA_DIR_PATH = ".dataworkspace/snapshot_metadata"
 CURRENT_LINEAGE_DIR_PATH = ".dataworkspace/current_lineage"
 SNAPSHOT_LINEAGE_DIR_PATH = ".dataworkspace/snapshot_lineage"
+# write_file_atomically() writes to a temporary file ending in .tmp before
+# renaming it into place. Any left behind by a crash must not be committed.
+TMP_FILES_GITIGNORE_ENTRY = "*.tmp"
+# snapshot metadata files are named HASH_md.json
+SNAPSHOT_METADATA_FILE_SUFFIX = "_md.json"
+_SNAPSHOT_METADATA_FILE_SUFFIX_LEN = len(SNAPSHOT_METADATA_FILE_SUFFIX)
 
 
 class GitFileLineageStore(FileLineageStore):
@@ -144,6 +159,11 @@ class GitFileLineageStore(FileLineageStore):
 class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin):
     def __init__(self, workspace_dir: str, batch: bool = False, verbose: bool = False):
         self.workspace_dir = workspace_dir  # type: str
+        # prefix of all paths within the workspace
+        self._workspace_dir_prefix = workspace_dir.rstrip("/") + "/"
+        # absolute paths of the snapshot directories, used on every snapshot lookup
+        self._snapshot_dir = join(workspace_dir, SNAPSHOT_DIR_PATH)
+        self._snapshot_md_dir = join(workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
         cf_data = self._load_json_file(CONFIG_FILE_PATH)
         super().__init__(cf_data["name"], cf_data["dws-version"], batch, verbose)
         self.global_params = cf_data["global_params"]
@@ -153,17 +173,52 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         ]  # TODO: make this user settable when creating the workspace
         assert isinstance(hostname, str)
         self.instance = hostname
-        self.resource_params = self._load_json_file(RESOURCES_FILE_PATH)  # type: List[JSONDict]
-        self.resource_params_by_name = {}  # type: Dict[str, JSONDict]
-        for r in self.resource_params:
-            self.resource_params_by_name[r["name"]] = r
-        self.resource_local_params_by_name = self._load_json_file(
-            RESOURCE_LOCAL_PARAMS_PATH
-        )  # type: Dict[str,JSONDict]
+        # The resource metadata files are only read when first needed (see the
+        # properties below), as many commands never look at the resources.
+        self._resource_params_by_name = None  # type: Optional[Dict[str, JSONDict]]
+        self._resource_local_params_by_name = None  # type: Optional[Dict[str,JSONDict]]
         self.lineage_store = GitFileLineageStore(self)
         self.scratch_dir = get_scratch_directory(
             self.workspace_dir, self.global_params, self.local_params
         )
+        # Parsed snapshot metadata, keyed by hash. This is populated on first
+        # use by _get_snapshot_md_cache() and kept in sync with our own writes.
+        self._snapshot_md_cache = None  # type: Optional[Dict[str, SnapshotMetadata]]
+        # reverse index from tag to snapshot hash, built along with the cache
+        self._snapshot_tag_index = None  # type: Optional[Dict[str, str]]
+        # entries of the top-level .gitignore file, read on first use
+        self._gitignore_entries = None  # type: Optional[Set[str]]
+        # Inside buffered_metadata_writes(), this maps the relative path of each
+        # metadata file to the latest object to be written there.
+        self._pending_json_writes = None  # type: Optional[Dict[str, Any]]
+        # set once we have checked that git-fat is available (if needed)
+        self._git_fat_validated = False
+        # set once we have checked that .dataworkspace/.gitignore excludes temporary files
+        self._tmp_files_gitignored = False
+
+    @property
+    def resource_params_by_name(self) -> Dict[str, JSONDict]:
+        """The parameters of each resource, indexed by resource name. Since dicts
+        preserve insertion order, this also keeps the order in which the resources
+        were added, which is the order used in resources.json.
+        """
+        if self._resource_params_by_name is None:
+            self._resource_params_by_name = {
+                r["name"]: r for r in self._load_json_file(RESOURCES_FILE_PATH)
+            }
+        return self._resource_params_by_name
+
+    def _save_resource_params(self) -> None:
+        self._save_json_to_file(list(self.resource_params_by_name.values()), RESOURCES_FILE_PATH)
+
+    @property
+    def resource_local_params_by_name(self) -> Dict[str, JSONDict]:
+        """The local parameters of each resource that has been added or cloned
+        on this machine, indexed by resource name.
+        """
+        if self._resource_local_params_by_name is None:
+            self._resource_local_params_by_name = self._load_json_file(RESOURCE_LOCAL_PARAMS_PATH)
+        return self._resource_local_params_by_name
 
     def get_instance(self) -> str:
         return self.instance
@@ -187,13 +242,52 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         f_path = join(self.workspace_dir, relative_path)
         if not exists(f_path):
             raise ConfigurationError("Did not find workspace metadata file %s" % f_path)
-        with open(f_path, "r") as f:
-            return json.load(f)
+        return load_json_file(f_path)
 
     def _save_json_to_file(self, obj, relative_path):
+        if self._pending_json_writes is not None:
+            self._pending_json_writes[relative_path] = obj
+            return
         f_path = join(self.workspace_dir, relative_path)
-        with open(f_path, "w") as f:
-            json.dump(obj, f, indent=2)
+        self._write_file_atomically(f_path, json_dumps(obj))
+
+    def _ensure_tmp_files_gitignored(self) -> None:
+        """Workspaces created before we started ignoring the temporary files of
+        write_file_atomically() do not have the entry in .dataworkspace/.gitignore.
+        Add it if needed, before our first write or commit. We only check the
+        first time we are called.
+        """
+        if not self._tmp_files_gitignored:
+            ensure_entry_in_gitignore(
+                self.workspace_dir,
+                GIT_IGNORE_FILE_PATH,
+                TMP_FILES_GITIGNORE_ENTRY,
+                commit=False,
+                verbose=self.verbose,
+            )
+            self._tmp_files_gitignored = True
+
+    def _write_file_atomically(self, path: str, data: bytes) -> None:
+        self._ensure_tmp_files_gitignored()
+        write_file_atomically(path, data)
+
+    @contextmanager
+    def buffered_metadata_writes(self) -> Iterator[None]:
+        """Hold back writes of the workspace's json metadata files until
+        the end of the block. Each file is then written once, with its latest
+        contents. Nested calls are folded into the outermost one.
+        """
+        if self._pending_json_writes is not None:
+            yield
+            return
+        self._pending_json_writes = {}
+        try:
+            yield
+        finally:
+            pending = self._pending_json_writes
+            self._pending_json_writes = None
+            for (relative_path, obj) in pending.items():
+                self._save_json_to_file(obj, relative_path)
 
     def _get_global_params(self) -> JSONDict:
         """Get a dict of configuration parameters for this workspace,
@@ -249,9 +343,8 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         Add the necessary state for a new resource to the workspace.
         """
         assert params["name"] == resource_name
-        self.resource_params.append(params)
         self.resource_params_by_name[resource_name] = params
-        self._save_json_to_file(self.resource_params, RESOURCES_FILE_PATH)
+        self._save_resource_params()
 
     def _add_local_params_for_resource(self, resource_name: str, local_params: JSONDict) -> None:
         """
@@ -268,12 +361,7 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
             "Missing resource params entry for resource %s" % resource_name
         )
         self.resource_params_by_name[resource_name][name] = value
-        for pdict in self.resource_params:
-            if pdict["name"] == resource_name:
-                pdict[name] = value
-                self._save_json_to_file(self.resource_params, RESOURCES_FILE_PATH)
-                return
-        assert 0, "Did not find resource params entry"
+        self._save_resource_params()
 
     def _set_local_param_for_resource(self, resource_name: str, name: str, value: Any) -> None:
         """It is up to the caller to verify that the resource exists and has
@@ -288,6 +376,21 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
     def get_workspace_local_path_if_any(self) -> Optional[str]:
         return self.workspace_dir
 
+    def _get_gitignore_entries(self) -> Set[str]:
+        """Return the entries of the workspace's top-level .gitignore file,
+        with leading and trailing slashes stripped. The file is only read
+        on the first call. After that, we add to the set as we add entries.
+        """
+        if self._gitignore_entries is None:
+            entries = set()  # type: Set[str]
+            gitignore_path = join(self.workspace_dir, ".gitignore")
+            if exists(gitignore_path):
+                with open(gitignore_path, "r") as f:
+                    for line in f:
+                        entries.add(strip_gitignore_slashes(line.rstrip()))
+            self._gitignore_entries = entries
+        return self._gitignore_entries
+
     def _add_local_dir_to_gitignore_if_needed(self, resource):
         """Figure out whether resource has a local path under the workspace's
         git repo, which needs to be added to .gitignore. If so, do it.
@@ -300,14 +403,18 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         if local_path is None:
             return
         assert isabs(local_path), "Resource local path should be absolute"
-        if commonpath([local_path, self.workspace_dir]) != self.workspace_dir:
+        if not local_path.startswith(self._workspace_dir_prefix):
             return None
-        local_relpath = local_path[len(self.workspace_dir) + 1 :]
+        local_relpath = local_path[len(self._workspace_dir_prefix) :]
         if not local_relpath.endswith("/"):
             local_relpath = local_relpath + "/"  # matches only directories
         # Add a / as the start to indicate that the path starts at the root of the repo.
         # Otherwise, we'll hit cases where the path could match other directories (e.g. issue #11)
         local_relpath = "/" + local_relpath if not local_relpath.startswith("/") else local_relpath
+        gitignore_entries = self._get_gitignore_entries()
+        entry_wo_slashes = strip_gitignore_slashes(local_relpath)
+        if entry_wo_slashes in gitignore_entries:
+            return
         ensure_entry_in_gitignore(
             self.workspace_dir,
             ".gitignore",
@@ -315,6 +422,7 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
             match_independent_of_slashes=True,
             verbose=self.verbose,
         )
+        gitignore_entries.add(entry_wo_slashes)
 
     def add_resource(
         self, name: str, resource_type: str, role: str, *args, **kwargs
@@ -348,8 +456,18 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
             )
         return scratch_path
 
+    def _validate_git_fat_in_path_if_needed(self) -> None:
+        """Check that the git-fat executable can be found, if this workspace
+        uses git-fat. The result does not change during the lifetime of the
+        workspace object, so we only check the first time we are called.
+        """
+        if not self._git_fat_validated:
+            validate_git_fat_in_path_if_needed(self.workspace_dir)
+            self._git_fat_validated = True
+
     def save(self, message: str) -> None:
         """Save the current state of the workspace"""
+        self._ensure_tmp_files_gitignored()
         commit_changes_in_repo(self.workspace_dir, message, verbose=self.verbose)
 
     def pull_workspace(self) -> ws.SyncedWorkspaceMixin:
@@ -359,7 +477,7 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
                 "Data workspace metadata repo at %s has uncommitted changes. Please commit before pulling."
                 % self.workspace_dir
             )
-        validate_git_fat_in_path_if_needed(self.workspace_dir)
+        self._validate_git_fat_in_path_if_needed()
 
         # do the pulls
         branch = self.get_dws_git_branch()
@@ -371,27 +489,35 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         # reload and return new workspace
         return Workspace(self.workspace_dir, batch=self.batch, verbose=self.verbose)
 
+    def _pull_resources_precheck(self, resource_list: List[ws.LocalStateResourceMixin]) -> None:
+        # git subdirectory resources all check the workspace repo itself
+        with cached_git_queries():
+            super()._pull_resources_precheck(resource_list)
+
     def _push_precheck(self, resource_list: List[ws.LocalStateResourceMixin]) -> None:
         branch = self.get_dws_git_branch()
-        if is_pull_needed_from_remote(self.workspace_dir, branch, self.verbose):
-            raise ConfigurationError(
-                "Data workspace at %s requires a pull from remote origin" % self.workspace_dir
-            )
-        validate_git_fat_in_path_if_needed(self.workspace_dir)
-        if is_git_dirty(self.workspace_dir):
-            if not self.batch:
-                click.echo(
-                    "Database workspace metadata repo at %s has uncommitted changes:"
-                    % self.workspace_dir
-                )
-                echo_git_status_for_user(self.workspace_dir)
-                click.confirm("Do you wish to continue anyway?", abort=True)
-            else:
+        # The workspace and each of its git subdirectory resources ask whether
+        # the workspace repo needs a pull, so we only want to go to the remote once.
+        with cached_git_queries():
+            if is_pull_needed_from_remote(self.workspace_dir, branch, self.verbose):
                 raise ConfigurationError(
-                    "Data workspace metadata repo at %s has uncommitted changes. Please commit before pushing."
-                    % self.workspace_dir
+                    "Data workspace at %s requires a pull from remote origin" % self.workspace_dir
                 )
-        super()._push_precheck(resource_list)
+            self._validate_git_fat_in_path_if_needed()
+            if is_git_dirty(self.workspace_dir):
+                if not self.batch:
+                    click.echo(
+                        "Database workspace metadata repo at %s has uncommitted changes:"
+                        % self.workspace_dir
+                    )
+                    echo_git_status_for_user(self.workspace_dir)
+                    click.confirm("Do you wish to continue anyway?", abort=True)
+                else:
+                    raise ConfigurationError(
+                        "Data workspace metadata repo at %s has uncommitted changes. Please commit before pushing."
+                        % self.workspace_dir
+                    )
+            super()._push_precheck(resource_list)
 
     def push(self, resource_list: List[ws.LocalStateResourceMixin]) -> None:
         branch = self.get_dws_git_branch()
@@ -413,53 +539,97 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         take snapshots in different copies of the workspace. Thus, we
         usually combine the snapshot with the hostname.
         """
-        md_dirpath = join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        if not isdir(md_dirpath):
-            return 1  # first snapshot
-        # we recursively walk the tree to be future-proof in case we
-        # find that we need to start putting metadata into subdirectories.
-        def process_dir(dirpath):
-            cnt = 0
-            for f in os.listdir(dirpath):
-                p = join(dirpath, f)
-                if isdir(p):
-                    cnt += process_dir(p)
-                elif f.endswith("_md.json"):
-                    cnt += 1
-            return cnt
-
-        return 1 + process_dir(md_dirpath)
+        # The snapshot command needs the metadata cache anyway (to check for
+        # an existing snapshot with the same hash), so counting the cached
+        # entries is cheaper than walking the metadata directory.
+        return 1 + len(self._get_snapshot_md_cache())
+
+    def _get_snapshot_md_cache(self) -> Dict[str, SnapshotMetadata]:
+        """Return a dict mapping snapshot hashes to their metadata. The
+        metadata files are read and parsed once, on the first call. After
+        that, the cache is updated in-place whenever we write or delete
+        snapshot metadata through this workspace object.
+        """
+        if self._snapshot_md_cache is None:
+            self._scan_snapshot_md_files()
+        assert self._snapshot_md_cache is not None
+        return self._snapshot_md_cache
+
+    def _scan_snapshot_md_files(
+        self, stop_at_tag: Optional[str] = None
+    ) -> Optional[SnapshotMetadata]:
+        """Parse the snapshot metadata files and populate the cache and tag index.
+        If stop_at_tag is specified, we return the metadata for that tag as soon as
+        we find it, leaving the cache unpopulated. Tags are unique across snapshots,
+        so there is no need to look further.
+        """
+        cache = {}  # type: Dict[str, SnapshotMetadata]
+        tag_index = {}  # type: Dict[str, str]
+        if isdir(self._snapshot_md_dir):
+            with os.scandir(self._snapshot_md_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(SNAPSHOT_METADATA_FILE_SUFFIX):
+                        continue
+                    md = SnapshotMetadata.from_json(load_json_file(entry.path))
+                    assert md.hashval == entry.name[:-_SNAPSHOT_METADATA_FILE_SUFFIX_LEN].lower()
+                    if stop_at_tag is not None and stop_at_tag in md.tags:
+                        return md
+                    cache[md.hashval] = md
+                    for tag in md.tags:
+                        tag_index[tag] = md.hashval
+        self._snapshot_md_cache = cache
+        self._snapshot_tag_index = tag_index
+        return None
+
+    def _get_snapshot_tag_index(self) -> Dict[str, str]:
+        """Return the dict mapping tags to snapshot hashes."""
+        self._get_snapshot_md_cache()
+        assert self._snapshot_tag_index is not None
+        return self._snapshot_tag_index
+
+    def _update_snapshot_md_cache(self, hash_val: str, md: Optional[SnapshotMetadata]) -> None:
+        """Replace the cached metadata for hash_val with md (or drop
+        it if md is None), keeping the tag index consistent.
+        """
+        cache = self._get_snapshot_md_cache()
+        tag_index = self._get_snapshot_tag_index()
+        old_md = cache.pop(hash_val, None)
+        if old_md is not None:
+            for tag in old_md.tags:
+                if tag_index.get(tag) == hash_val:
+                    del tag_index[tag]
+        if md is not None:
+            cache[hash_val] = md
+            for tag in md.tags:
+                tag_index[tag] = hash_val
 
     def get_snapshot_metadata(self, hash_val: str) -> SnapshotMetadata:
+        """If we have not yet loaded all the snapshot metadata, just read
+        the one file for this hash, rather than populating the whole cache.
+        """
         hash_val = hash_val.lower()
-        md_filename = join(
-            join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH), "%s_md.json" % hash_val
-        )
-        if not exists(md_filename):
+        if self._snapshot_md_cache is not None:
+            md = self._snapshot_md_cache.get(hash_val)
+        else:
+            md_file = join(self._snapshot_md_dir, hash_val + SNAPSHOT_METADATA_FILE_SUFFIX)
+            md = SnapshotMetadata.from_json(load_json_file(md_file)) if exists(md_file) else None
+        if md is None:
             raise ConfigurationError("No metadata entry for snapshot %s" % hash_val)
-        with open(md_filename, "r") as f:
-            data = json.load(f)
-        md = ws.SnapshotMetadata.from_json(data)
-        assert md.hashval == hash_val
         return md
 
     def get_snapshot_by_tag(self, tag: str) -> SnapshotMetadata:
         """Given a tag, return the asssociated snapshot metadata.
-        This lookup could be slower ,if a reverse index is not kept."""
-        md_dir = join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        if not exists(md_dir):
-            raise ConfigurationError(f"Snapshot for tag {tag} not found")
-        regexp = re.compile(re.escape(tag))
-        for fname in os.listdir(md_dir):
-            if not fname.endswith("_md.json"):
-                continue
-            fpath = join(md_dir, fname)
-            with open(fpath, "r") as f:
-                raw_data = f.read()
-            if regexp.search(raw_data) is not None:
-                md = SnapshotMetadata.from_json(json.loads(raw_data))
-                if md.has_tag(tag):
-                    return md
+        Once the metadata is cached, we use the reverse index, so this is just
+        a dict lookup. Otherwise, we stop reading metadata files at the first match.
+        If there is no match, we have read all the files and the cache is populated.
+        """
+        if self._snapshot_md_cache is None:
+            md = self._scan_snapshot_md_files(stop_at_tag=tag)
+            if md is not None:
+                return md
+        hash_val = self._get_snapshot_tag_index().get(tag)
+        if hash_val is not None:
+            return self.get_snapshot_metadata(hash_val)
         raise ConfigurationError("Snapshot for tag %s not found" % tag)
 
     def get_snapshot_by_partial_hash(self, partial_hash: str) -> SnapshotMetadata:
@@ -467,20 +637,23 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         starts with this prefix and return the metadata
         asssociated with the snapshot.
         """
-        partial_hash = partial_hash.lower()
-        md_dir = join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        for fname in os.listdir(md_dir):
-            if not fname.endswith("_md.json"):
-                continue
-            hashval = fname[0:-8].lower()
-            if not hashval.startswith(partial_hash):
-                continue
-            return self.get_snapshot_metadata(hashval)
+        if self._snapshot_md_cache is not None:
+            for md in self._snapshot_md_cache.values():
+                if md.matches_partial_hash(partial_hash):
+                    return md
+        elif isdir(self._snapshot_md_dir):
+            # the hash is in the filename, so we only need to parse the matching file
+            prefix = partial_hash.lower()
+            with os.scandir(self._snapshot_md_dir) as it:
+                for entry in it:
+                    if entry.name.startswith(prefix) and entry.name.endswith(
+                        SNAPSHOT_METADATA_FILE_SUFFIX
+                    ):
+                        return SnapshotMetadata.from_json(load_json_file(entry.path))
         raise ConfigurationError("Snapshot match for partial hash %s not found" % partial_hash)
 
     def _get_snapshot_manifest_as_bytes(self, hash_val: str) -> bytes:
-        snapshot_dir = join(self.workspace_dir, SNAPSHOT_DIR_PATH)
-        snapshot_file = join(snapshot_dir, "snapshot-%s.json" % hash_val.lower())
+        snapshot_file = join(self._snapshot_dir, "snapshot-%s.json" % hash_val.lower())
         if not exists(snapshot_file):
             raise ConfigurationError("No snapshot found for hash value %s" % hash_val)
         with open(snapshot_file, "rb") as f:
@@ -493,23 +666,26 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         (or descending if reverse is True). If max_count is specified, return at
         most that many snaphsots.
         """
-        md_dir = join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        snapshots = []
-        for fname in os.listdir(md_dir):
-            if not fname.endswith("_md.json"):
-                continue
-            with open(join(md_dir, fname), "r") as f:
-                snapshots.append(SnapshotMetadata.from_json(json.load(f)))
-        snapshots.sort(key=lambda md: md.timestamp, reverse=reverse)
-        return snapshots if max_count is None else snapshots[0:max_count]
+        snapshots = self._get_snapshot_md_cache().values()
+        key = attrgetter("timestamp")
+        if max_count is None:
+            return sorted(snapshots, key=key, reverse=reverse)
+        # partial sort - these are equivalent to sorted(...)[0:max_count]
+        elif reverse:
+            return heapq.nlargest(max_count, snapshots, key=key)
+        else:
+            return heapq.nsmallest(max_count, snapshots, key=key)
 
     def _delete_snapshot_metadata_and_manifest(self, hash_val: str) -> None:
         """Given a snapshot hash, delete the associated metadata.
         """
         rel_snapshot_file = join(SNAPSHOT_DIR_PATH, "snapshot-%s.json" % hash_val.lower())
         git_remove_file(self.workspace_dir, rel_snapshot_file, verbose=self.verbose)
-        rel_metadata_file = join(SNAPSHOT_METADATA_DIR_PATH, "%s_md.json" % hash_val.lower())
+        rel_metadata_file = join(
+            SNAPSHOT_METADATA_DIR_PATH, hash_val.lower() + SNAPSHOT_METADATA_FILE_SUFFIX
+        )
         git_remove_file(self.workspace_dir, rel_metadata_file, verbose=self.verbose)
+        self._update_snapshot_md_cache(hash_val.lower(), None)
 
     def _snapshot_precheck(self, current_resources: Iterable[ws.Resource]) -> None:
         """Run any prechecks before taking a snapshot. This should throw
@@ -517,7 +693,24 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         """
         # call prechecks on the individual resources
         super()._snapshot_precheck(current_resources)
-        validate_git_fat_in_path_if_needed(self.workspace_dir)
+        self._validate_git_fat_in_path_if_needed()
+
+    def _prepare_resources_for_snapshot(self, current_resources: Iterable[ws.Resource]) -> None:
+        """The git subdirectory resources each commit their subdirectory of the
+        workspace repo ahead of the snapshot. We commit all of them together here,
+        so that their own checks find nothing left to commit. Subdirectories in
+        the results role are not included, as their snapshot() does not commit
+        (e.g. leftover README files stay uncommitted).
+        """
+        from dataworkspaces.resources.git_resource import GitRepoSubdirResource
+
+        subdirs = [
+            r.relative_path for r in current_resources if isinstance(r, GitRepoSubdirResource)
+        ]
+        if len(subdirs) > 1:
+            commit_changes_in_repo_subdirs(
+                self.workspace_dir, subdirs, "autocommit ahead of snapshot", verbose=self.verbose
+            )
 
     def _restore_precheck(
         self,
@@ -527,9 +720,11 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         """Run any prechecks before restoring. This should throw
         a ConfigurationError if the restore would fail for some reason.
         """
-        # call prechecks on the individual resources
-        super()._restore_precheck(restore_hashes, restore_resources)
-        validate_git_fat_in_path_if_needed(self.workspace_dir)
+        # call prechecks on the individual resources. The git subdirectory
+        # resources all check for their restore commit in the workspace repo.
+        with cached_git_queries():
+            super()._restore_precheck(restore_hashes, restore_resources)
+        self._validate_git_fat_in_path_if_needed()
 
     def restore(
         self,
@@ -547,36 +742,37 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
         """Remove the specified tag from the specified snapshot. Throw an
         InternalError if either the snapshot or the tag do not exist.
         """
-        md_filename = join(
-            join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH), "%s_md.json" % hash_val.lower()
-        )
-        if not exists(md_filename):
+        md = self._get_snapshot_md_cache().get(hash_val.lower())
+        if md is None:
             raise InternalError("No metadata entry for snapshot %s" % hash_val)
-        with open(md_filename, "r") as f:
-            data = json.load(f)
-        md = ws.SnapshotMetadata.from_json(data)
-        assert md.hashval == hash_val
+        md_filename = join(self._snapshot_md_dir, md.hashval + SNAPSHOT_METADATA_FILE_SUFFIX)
         if tag not in md.tags:
             raise InternalError("Tag %s not found in snapshot %s" % (tag, hash_val))
-        md.tags = [tag for tag in md.tags if tag != tag]
-        with open(md_filename, "w") as f:
-            json.dump(md.to_json(), f, indent=2)
+        new_tags = [t for t in md.tags if t != tag]
+        # write the file before touching the cached metadata, so that a failed
+        # write leaves the cache and tag index as they were
+        md_json = md.to_json()
+        md_json["tags"] = new_tags
+        self._write_file_atomically(md_filename, json_dumps(md_json))
+        self._update_snapshot_md_cache(md.hashval, None)
+        md.tags = new_tags
+        self._update_snapshot_md_cache(md.hashval, md)
 
     def save_snapshot_metadata_and_manifest(
         self, metadata: SnapshotMetadata, manifest: bytes
     ) -> None:
-        snapshot_dir_path = join(self.workspace_dir, SNAPSHOT_DIR_PATH)
-        if not exists(snapshot_dir_path):
-            os.makedirs(snapshot_dir_path)
-        snapshot_manifest_path = join(snapshot_dir_path, "snapshot-%s.json" % metadata.hashval)
-        with open(snapshot_manifest_path, "wb") as f:
-            f.write(manifest)
-        snapshot_md_dir = join(self.workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        if not exists(snapshot_md_dir):
-            os.makedirs(snapshot_md_dir)
-        snapshot_metadata_path = join(snapshot_md_dir, "%s_md.json" % metadata.hashval)
-        with open(snapshot_metadata_path, "w") as mdf:
-            json.dump(metadata.to_json(), mdf, indent=2)
+        # serialize the metadata up front, so that a failure here does not
+        # leave behind a manifest without its metadata
+        metadata_bytes = json_dumps(metadata.to_json())
+        os.makedirs(self._snapshot_dir, exist_ok=True)
+        snapshot_manifest_path = join(self._snapshot_dir, "snapshot-%s.json" % metadata.hashval)
+        self._write_file_atomically(snapshot_manifest_path, manifest)
+        os.makedirs(self._snapshot_md_dir, exist_ok=True)
+        snapshot_metadata_path = join(
+            self._snapshot_md_dir, metadata.hashval + SNAPSHOT_METADATA_FILE_SUFFIX
+        )
+        self._write_file_atomically(snapshot_metadata_path, metadata_bytes)
+        self._update_snapshot_md_cache(metadata.hashval, metadata)
 
     def as_snapshot_ws(self) -> ws.SnapshotWorkspaceMixin:
         """If this workspace supports snapshots, cast
@@ -607,6 +803,15 @@ class Workspace(ws.Workspace, ws.SyncedWorkspaceMixin, ws.SnapshotWorkspaceMixin
             return dws_git_branch
 
 
+def _write_json_files(base_dir: str, files: Dict[str, Any]) -> None:
+    """Write out the initial json metadata files for a new or cloned
+    workspace. files maps the relative path of each file to its contents.
+    """
+    for (relative_path, obj) in files.items():
+        with open(join(base_dir, relative_path), "wb") as f:
+            f.write(json_dumps(obj))
+
+
 class WorkspaceFactory(ws.WorkspaceFactory):
     @staticmethod
     def load_workspace(batch: bool, verbose: bool, parsed_uri: ParseResult) -> ws.Workspace:  # type: ignore
@@ -650,11 +855,8 @@ class WorkspaceFactory(ws.WorkspaceFactory):
                 + " Has this workspace already been initialized?"
             )
         verify_git_config_initialized(workspace_dir, batch=batch, verbose=verbose)
-        os.mkdir(md_dir)
-        snapshot_dir = join(workspace_dir, SNAPSHOT_DIR_PATH)
-        os.mkdir(snapshot_dir)
-        snapshot_md_dir = join(workspace_dir, SNAPSHOT_METADATA_DIR_PATH)
-        os.mkdir(snapshot_md_dir)
+        for rel_dir in (SNAPSHOT_DIR_PATH, SNAPSHOT_METADATA_DIR_PATH, CURRENT_LINEAGE_DIR_PATH):
+            os.makedirs(join(workspace_dir, rel_dir))  # also creates md_dir
 
         (abs_scratch_dir, scratch_dir_gitignore) = init_scratch_directory(
             scratch_dir, workspace_dir, global_params, local_params
@@ -663,18 +865,23 @@ class WorkspaceFactory(ws.WorkspaceFactory):
             click.echo("%s is already a git repository, will just add to it" % workspace_dir)
         else:
             git_init(workspace_dir, verbose=verbose)
-        with open(join(workspace_dir, RESOURCES_FILE_PATH), "w") as f:
-            json.dump([], f, indent=2)
-        with open(join(workspace_dir, LOCAL_PARAMS_PATH), "w") as f:
-            json.dump(local_params, f, indent=2)
-        with open(join(workspace_dir, RESOURCE_LOCAL_PARAMS_PATH), "w") as f:
-            json.dump({}, f, indent=2)
-        os.mkdir(join(workspace_dir, CURRENT_LINEAGE_DIR_PATH))
-
+        _write_json_files(
+            workspace_dir,
+            {
+                RESOURCES_FILE_PATH: [],
+                LOCAL_PARAMS_PATH: local_params,
+                RESOURCE_LOCAL_PARAMS_PATH: {},
+            },
+        )
         with open(join(workspace_dir, GIT_IGNORE_FILE_PATH), "a") as f:
-            f.write("%s\n" % basename(LOCAL_PARAMS_PATH))
-            f.write("%s\n" % basename(RESOURCE_LOCAL_PARAMS_PATH))
-            f.write("current_lineage/\n")
+            f.write(
+                "%s\n%s\ncurrent_lineage/\n%s\n"
+                % (
+                    basename(LOCAL_PARAMS_PATH),
+                    basename(RESOURCE_LOCAL_PARAMS_PATH),
+                    TMP_FILES_GITIGNORE_ENTRY,
+                )
+            )
         git_add(
             workspace_dir,
             [RESOURCES_FILE_PATH, GIT_IGNORE_FILE_PATH],
@@ -704,16 +911,16 @@ class WorkspaceFactory(ws.WorkspaceFactory):
         # are on, create the config file and commit that.
         (dws_git_branch, _) = get_branch_info(workspace_dir, verbose=verbose)
         global_params[DWS_GIT_BRANCH] = dws_git_branch
-        with open(join(workspace_dir, CONFIG_FILE_PATH), "w") as f:
-            json.dump(
-                {
+        _write_json_files(
+            workspace_dir,
+            {
+                CONFIG_FILE_PATH: {
                     "name": workspace_name,
                     "dws-version": dws_version,
                     "global_params": global_params,
-                },
-                f,
-                indent=2,
-            )
+                }
+            },
+        )
         git_add(workspace_dir, [CONFIG_FILE_PATH], verbose=verbose)
         commit_changes_in_repo(workspace_dir, "dws init (config.json)", verbose=verbose)
 
@@ -771,22 +978,21 @@ class WorkspaceFactory(ws.WorkspaceFactory):
 
         verify_git_config_initialized(parent_dir, batch=batch, verbose=verbose)
 
-        # ping the remote repo
-        cmd = [GIT_EXE_PATH, "ls-remote", "--quiet", repository]
-        try:
-            call_subprocess(cmd, parent_dir, verbose)
-        except Exception as e:
-            raise ConfigurationError("Unable to access remote repository '%s'" % repository) from e
-
-        # we have to clone the repo first to find out its name!
+        # we have to clone the repo first to find out its name! We don't ping the
+        # remote repo beforehand, as the clone fails in the same way if we cannot
+        # access it, and a ping would cost an extra round trip.
         try:
             cmd = [GIT_EXE_PATH, "clone", repository, initial_path]
-            call_subprocess(cmd, parent_dir, verbose)
+            try:
+                call_subprocess(cmd, parent_dir, verbose)
+            except CalledProcessError as e:
+                raise ConfigurationError(
+                    "Unable to clone remote repository '%s'" % repository
+                ) from e
             config_file = join(initial_path, CONFIG_FILE_PATH)
             if not exists(config_file):
                 raise ConfigurationError("Did not find configuration file in remote repo")
-            with open(config_file, "r") as f:
-                config_json = json.load(f)
+            config_json = load_json_file(config_file)
             if "name" not in config_json:
                 raise InternalError("Missing 'name' property in configuration file")
             workspace_name = config_json["name"]
@@ -800,8 +1006,7 @@ class WorkspaceFactory(ws.WorkspaceFactory):
             cf_path = join(directory, CONFIG_FILE_PATH)
             if not exists(cf_path):
                 raise ConfigurationError("Did not find workspace config file %s" % cf_path)
-            with open(cf_path, "r") as f:
-                cf_data = json.load(f)
+            cf_data = load_json_file(cf_path)
             global_params = cf_data["global_params"]
             # get the scratch directory (also adds local param if needed)
             abs_scratch_dir = clone_scratch_directory(directory, global_params, local_params, batch)
@@ -813,23 +1018,19 @@ class WorkspaceFactory(ws.WorkspaceFactory):
                 if verbose:
                     print("Creating scratch directory %s" % abs_scratch_dir)
                 os.makedirs(abs_scratch_dir)
-            with open(join(directory, LOCAL_PARAMS_PATH), "w") as f:
-                json.dump(local_params, f, indent=2)  # create an initial local params file
-            with open(join(directory, RESOURCE_LOCAL_PARAMS_PATH), "w") as f:
-                json.dump(
-                    {}, f, indent=2
-                )  # create resource local params, to be populated via resource clones
-            snapshot_md_dir = join(directory, SNAPSHOT_METADATA_DIR_PATH)
-            if not exists(snapshot_md_dir):
-                # It is possible that we are cloning a repo with no snapshots
-                os.mkdir(snapshot_md_dir)
-            snapshot_dir = join(directory, SNAPSHOT_DIR_PATH)
-            if not exists(snapshot_dir):
-                # It is possible that we are cloning a repo with no snapshots
-                os.mkdir(snapshot_dir)
-            current_lineage_dir = join(directory, CURRENT_LINEAGE_DIR_PATH)
-            if not exists(current_lineage_dir):
-                os.mkdir(current_lineage_dir)
+            # create an initial local params file and the resource local params,
+            # which get populated via resource clones
+            _write_json_files(
+                directory, {LOCAL_PARAMS_PATH: local_params, RESOURCE_LOCAL_PARAMS_PATH: {}}
+            )
+            # It is possible that we are cloning a repo with no snapshots, so the
+            # snapshot directories may be missing.
+            for rel_dir in (
+                SNAPSHOT_METADATA_DIR_PATH,
+                SNAPSHOT_DIR_PATH,
+                CURRENT_LINEAGE_DIR_PATH,
+            ):
+                os.makedirs(join(directory, rel_dir), exist_ok=True)
             if is_a_git_fat_repo(directory):
                 validate_git_fat_in_path()
                 import dataworkspaces.third_party.git_fat as git_fat
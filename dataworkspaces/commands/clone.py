@@ -18,8 +18,9 @@ def clone_command(
         click.echo("No resources with local state to clone.")
     else:
         click.echo("Will clone the following resources: %s" % ", ".join(rnames))
-        for rname in rnames:
-            workspace.clone_resource(rname)
+        with workspace.buffered_metadata_writes():
+            for rname in rnames:
+                workspace.clone_resource(rname)
 
     workspace.save("Clone")
     click.echo("Successfully completed clone of workspace %s." % workspace.name)
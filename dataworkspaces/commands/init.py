@@ -44,15 +44,16 @@ def init_command(
 
     if len(create_resources) > 0:
         click.echo("Will now create sub-directory resources for " + ", ".join(create_resources))
-        for role in create_resources:
-            assert role in RESOURCE_ROLE_CHOICES, "bad role name %s" % role
-            workspace.add_resource(
-                role,
-                "git-subdirectory",
-                role,
-                join(workspace_dir, role),
-                confirm_subdir_create=False,
-            )
+        with workspace.buffered_metadata_writes():
+            for role in create_resources:
+                assert role in RESOURCE_ROLE_CHOICES, "bad role name %s" % role
+                workspace.add_resource(
+                    role,
+                    "git-subdirectory",
+                    role,
+                    join(workspace_dir, role),
+                    confirm_subdir_create=False,
+                )
         click.echo("Finished initializing resources:")
         for role in create_resources:
             click.echo("  %s: ./%s" % (role, role))
@@ -10,7 +10,13 @@ from dataworkspaces.workspace import Workspace, SyncedWorkspaceMixin, CentralWor
 
 def _pull_and_clone_resources(workspace, only, skip):
     resource_list_names = build_resource_list(workspace, only, skip)
-    clone_set = frozenset(workspace.get_names_for_resources_that_need_to_be_cloned())
+    if len(resource_list_names) == 0:
+        click.echo("No resources to update.")
+        return 0
+    # only check the resources we were asked to pull
+    clone_set = frozenset(
+        workspace.get_names_for_resources_that_need_to_be_cloned(resource_list_names)
+    )
     pull_resources = [
         workspace.get_resource(rn) for rn in resource_list_names if rn not in clone_set
     ]
@@ -22,8 +28,9 @@ def _pull_and_clone_resources(workspace, only, skip):
     clone_name_list = [rn for rn in resource_list_names if rn in clone_set]
     if len(clone_name_list) > 0:
         click.echo("Cloning new resources: %s" % ", ".join(clone_name_list))
-        for rn in clone_name_list:
-            workspace.clone_resource(rn)
+        with workspace.buffered_metadata_writes():
+            for rn in clone_name_list:
+                workspace.clone_resource(rn)
     return len(pull_resources) + len(clone_name_list)
 
 
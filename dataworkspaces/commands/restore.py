@@ -27,11 +27,10 @@ def restore_command(
     md = mixin.get_snapshot_by_tag_or_hash(tag_or_hash)
 
     # process the lists of resources
-    current_names = set(workspace.get_resource_names())
+    current_name_list = list(workspace.get_resource_names())
+    current_names = set(current_name_list)
     # get the non-null resources in snapshot
-    snapshot_names = set(
-        [rn for rn in md.restore_hashes.keys() if md.restore_hashes[rn] is not None]
-    )
+    snapshot_names = {rn for (rn, h) in md.restore_hashes.items() if h is not None}
     all_names = current_names.union(snapshot_names)
     if (only is not None) and (leave is not None):
         raise ApiParamError("Cannot specify both only and leave for restore command.")
@@ -46,13 +45,14 @@ def restore_command(
         restore_set = all_names
 
     # We need to remove result resources from the restore set, as we
-    # do not restore them to their prior state.
-    result_resources = {
+    # do not restore them to their prior state. Names that are only in
+    # the snapshot have no role in the current workspace and are handled below.
+    result_resources_in_restore_set = {
         rname
         for rname in restore_set
-        if workspace.get_resource_role(rname) == ResourceRoles.RESULTS
+        if rname in current_names
+        and workspace.get_resource_role(rname) == ResourceRoles.RESULTS
     }
-    result_resources_in_restore_set = result_resources.intersection(restore_set)
     if len(result_resources_in_restore_set) > 0:
         if strict:
             raise ConfigurationError(
@@ -64,7 +64,7 @@ def restore_command(
                 "Skipping the restore of the following result resources, which are left in their latest state: %s"
                 % ", ".join(result_resources_in_restore_set)
             )
-            restore_set = restore_set.difference(result_resources)
+            restore_set = restore_set.difference(result_resources_in_restore_set)
 
     # error checking
     invalid = restore_set.difference(all_names)
@@ -100,7 +100,7 @@ def restore_command(
             restore_set = restore_set.difference(added_names)
 
     # get ordered list of names and resources as well as restore hashes
-    restore_name_list = [rn for rn in workspace.get_resource_names() if rn in restore_set]
+    restore_name_list = [rn for rn in current_name_list if rn in restore_set]
     if len(restore_name_list) == 0:
         click.echo("No resources to restore.")
         return 0
@@ -14,28 +14,9 @@ from argparse import Namespace
 from collections.abc import Sequence
 
 from dataworkspaces import __version__
-from dataworkspaces.commands.init import init_command
-from dataworkspaces.commands.add import add_command
-from dataworkspaces.commands.snapshot import snapshot_command
-from dataworkspaces.commands.delete_snapshot import delete_snapshot_command
-from dataworkspaces.commands.restore import restore_command
-from dataworkspaces.commands.status import status_command
-from dataworkspaces.commands.report import (
-    report_status_command,
-    report_history_command,
-    report_lineage_command,
-    report_results_command,
-)
-from dataworkspaces.commands.publish import publish_command
-from dataworkspaces.commands.push import push_command
-from dataworkspaces.commands.pull import pull_command
-from dataworkspaces.commands.clone import clone_command
-
-# from dataworkspaces.commands.run import run_command
-from dataworkspaces.commands.diff import diff_command
-from dataworkspaces.commands.lineage import lineage_graph_command
-from dataworkspaces.commands.deploy import deploy_build_command, deploy_run_command
-from dataworkspaces.commands.config import config_command
+
+# The command implementations (dataworkspaces.commands.*) are imported within
+# the click command functions, so that each invocation only loads the one it runs.
 from dataworkspaces.workspace import (
     RESOURCE_ROLE_CHOICES,
     ResourceRoles,
@@ -47,9 +28,14 @@ from dataworkspaces.utils.param_utils import DEFAULT_HOSTNAME
 from dataworkspaces.utils.regexp_utils import HOSTNAME_RE
 from dataworkspaces.utils.file_utils import LocalPathType
 
-CURR_DIR = abspath(expanduser(curdir))
-CURR_DIRNAME = basename(CURR_DIR)
-DWS_PATHDIR = _find_containing_workspace()
+
+def _curr_dirname() -> str:
+    """Default workspace name for init. Like the --workspace-dir defaults
+    (_find_containing_workspace), this is evaluated when the command runs,
+    not when this module is imported.
+    """
+    return basename(abspath(expanduser(curdir)))
+
 
 # we are going to store the verbose mode
 # in a global here and wrap it in a function
@@ -67,17 +53,18 @@ class WorkspaceDirParamType(click.ParamType):
 
     def convert(self, value, param, ctx):
         path = abspath(expanduser(value))
-        wspath = join(path, ".dataworkspace")
-        if not isdir(path):
+        # In the common case, .dataworkspace exists and we only need one check.
+        # Checking path itself is only needed to pick the error message.
+        if isdir(join(path, ".dataworkspace")):
+            return path
+        elif not isdir(path):
             self.fail("Directory '%s' does not exist" % value, param, ctx)
-        elif not isdir(wspath):
+        else:
             self.fail(
                 "No .dataworkspace directory found under '%s'. Did you run 'dws init'?" % value,
                 param,
                 ctx,
             )
-        else:
-            return path
 
 
 WORKSPACE_PARAM = WorkspaceDirParamType()
@@ -276,7 +263,7 @@ RESOURCE_PARAM = ResourceParamType()
     + " For example --git-lfs-attributes='*.gz,*.zip'. If you do not specify"
     + " here, you can always add the .gitattributes file later.",
 )
-@click.argument("name", default=CURR_DIRNAME)
+@click.argument("name", default=_curr_dirname)
 @click.pass_context
 def init(
     ctx,
@@ -308,6 +295,7 @@ def init(
             + "you also need to specify --git-fat-remote",
             option_name="--git-fat-remote",
         )
+    from dataworkspaces.commands.init import init_command
     init_command(
         name,
         hostname,
@@ -330,7 +318,7 @@ cli.add_command(init)
 # This should be dynamically extensible, but we will hard
 # code things for now.
 @click.group()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.pass_context
 def add(ctx, workspace_dir):
     """Add a data collection to the workspace as a resource. 
@@ -402,6 +390,7 @@ def local_files(ctx, role, name, compute_hash: bool, export: bool, imported: boo
         raise click.BadOptionUsage(
             message="--imported only for source-data roles", option_name="imported"
         )
+    from dataworkspaces.commands.add import add_command
     add_command("file", role, name, workspace, path, compute_hash, export, imported)
 
 
@@ -509,6 +498,7 @@ def rclone(
         )
     local_path = abspath(expanduser(local_path))
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.add import add_command
     add_command(
         "rclone",
         role,
@@ -596,6 +586,7 @@ def git(ctx, role, name, branch, read_only, export, imported, path):
 
     path = abspath(expanduser(path))
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.add import add_command
     add_command("git", role, name, workspace, path, branch, read_only, export, imported)
 
 
@@ -620,6 +611,7 @@ def api_resource(ctx, role, name):
                 type=DATA_ROLE_PARAM,
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.add import add_command
     add_command("api-resource", role, name, workspace)
 
 
@@ -644,6 +636,7 @@ def s3(ctx, role, name, bucket_name: str):
                 type=ROLE_PARAM,
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.add import add_command
     add_command("s3", role, name, workspace, bucket_name)
 
 
@@ -651,7 +644,7 @@ add.add_command(s3)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option("--message", "-m", type=str, default="", help="Message describing the snapshot")
 @click.argument("tag", type=HOST_PARAM, default=None, required=False)
 @click.pass_context
@@ -666,6 +659,7 @@ def snapshot(ctx, workspace_dir, message, tag):
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.snapshot import snapshot_command
     snapshot_command(workspace, tag, message)
 
 
@@ -673,7 +667,7 @@ cli.add_command(snapshot)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--no-include-resources",
     is_flag=True,
@@ -696,6 +690,7 @@ def delete_snapshot(ctx, workspace_dir: str, no_include_resources: bool, tag_or_
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.delete_snapshot import delete_snapshot_command
     delete_snapshot_command(workspace, tag_or_hash, no_include_resources)
 
 
@@ -703,7 +698,7 @@ cli.add_command(delete_snapshot)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--only",
     type=str,
@@ -747,6 +742,7 @@ def restore(
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.restore import restore_command
     restore_command(
         workspace,
         tag_or_hash,
@@ -760,7 +756,7 @@ cli.add_command(restore)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--skip",
     type=str,
@@ -783,6 +779,9 @@ def publish(ctx, workspace_dir, skip: str, remote_repository):
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.publish import publish_command
+    from dataworkspaces.commands.push import push_command
+
     publish_command(workspace, remote_repository)
     push_command(workspace, only=None, skip=skip.split(",") if skip else None, only_workspace=False)
 
@@ -791,7 +790,7 @@ cli.add_command(publish)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--only",
     type=str,
@@ -831,6 +830,7 @@ def push(ctx, workspace_dir: str, only: Optional[str], skip: Optional[str], only
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.push import push_command
     push_command(
         workspace,
         only=only.split(",") if only else None,
@@ -843,7 +843,7 @@ cli.add_command(push)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--only",
     type=str,
@@ -883,6 +883,7 @@ def pull(ctx, workspace_dir: str, only: Optional[str], skip: Optional[str], only
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.pull import pull_command
     pull_command(
         workspace,
         only=only.split(",") if only else None,
@@ -918,6 +919,7 @@ def clone(ctx, hostname, repository, directory):
             )
         else:
             hostname = DEFAULT_HOSTNAME
+    from dataworkspaces.commands.clone import clone_command
     clone_command(
         "dataworkspaces.backends.git", hostname, ns.batch, ns.verbose, repository, directory
     )
@@ -928,7 +930,7 @@ cli.add_command(clone)
 
 # The report command has subcommands for specific reports on the workspace
 @click.group()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.pass_context
 def report(ctx, workspace_dir):
     """Report generation commands"""
@@ -953,6 +955,7 @@ def report_status(ctx):
     """Show the status of resources in this workspace. Subcommand of ``report``."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.report import report_status_command
     report_status_command(workspace)
 
 
@@ -971,6 +974,7 @@ def report_history(ctx, limit):
     """Show the history of snapshots. Subcommand of ``report``."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.report import report_history_command
     report_history_command(workspace, limit)
 
 
@@ -990,6 +994,7 @@ def report_lineage(ctx, snapshot=None):
     Subcommand of ``report``."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.report import report_lineage_command
     report_lineage_command(workspace, snapshot)
 
 
@@ -1014,6 +1019,7 @@ def report_results(ctx, snapshot=None, resource=None):
     """Show the contents of a results file.  Subcommand of ``report``."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.report import report_results_command
     report_results_command(workspace, snapshot, resource)
 
 
@@ -1021,7 +1027,7 @@ report.add_command(report_results)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option("--history", is_flag=True, default=False, help="Show previous snapshots")
 @click.option(
     "--limit",
@@ -1041,6 +1047,7 @@ def status(ctx, workspace_dir, history, limit):
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.status import status_command
     status_command(workspace, history, limit)
 
 
@@ -1060,7 +1067,7 @@ cli.add_command(version)
 # Disable run command for now, until we better understand how it interacts with the
 # Lineage API. TODO: re-enable with the proper integration.
 # @click.command()
-# @click.option('--workspace-dir', type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+# @click.option('--workspace-dir', type=WORKSPACE_PARAM, default=_find_containing_workspace)
 # @click.option('--step-name', default=None,
 #               help="Name of step to associate with this command (defaults to base name of command without file extension)")
 # @click.option('--cwd', default=CURR_DIR,
@@ -1078,13 +1085,14 @@ cli.add_command(version)
 #         else:
 #             workspace_dir = click.prompt("Please enter the workspace root dir",
 #                                          type=WORKSPACE_PARAM)
+#     from dataworkspaces.commands.run import run_command
 #     run_command(workspace_dir, step_name, cwd, command, command_arguments, ns.batch, ns.verbose)
 
 # cli.add_command(run)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.argument("snapshot_or_tag1", metavar="SNAPSHOT_OR_TAG1", type=str)
 @click.argument("snapshot_or_tag2", metavar="SNAPSHOT_OR_TAG2", type=str)
 @click.pass_context
@@ -1099,6 +1107,7 @@ def diff(ctx, workspace_dir, snapshot_or_tag1, snapshot_or_tag2):
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.diff import diff_command
     diff_command(workspace, snapshot_or_tag1, snapshot_or_tag2)
 
 
@@ -1106,7 +1115,7 @@ cli.add_command(diff)
 
 # from .commands.show import show_command
 # @click.command()
-# @click.option('--workspace-dir', type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+# @click.option('--workspace-dir', type=WORKSPACE_PARAM, default=_find_containing_workspace)
 # @click.pass_context
 # def show(ctx, workspace_dir, limit):
 #     """Show the current state of the workspace"""
@@ -1119,7 +1128,7 @@ cli.add_command(diff)
 # The lineage command has subcommands for specific tasks
 # with the linage.
 @click.group()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.pass_context
 def lineage(ctx, workspace_dir):
     """Lineage-related commands"""
@@ -1183,6 +1192,7 @@ def graph(
     """Graph the lineage of a resource, writing the graph to an HTML file. Subcommand of ``lineage``"""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.lineage import lineage_graph_command
     lineage_graph_command(workspace, output_file, resource, snapshot, format, width, height)
 
 
@@ -1191,7 +1201,7 @@ lineage.add_command(graph)
 
 # The deploy command has subcommands for specific tasks related to deployment
 @click.group()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.pass_context
 def deploy(ctx, workspace_dir):
     """Lineage-related commands"""
@@ -1247,6 +1257,7 @@ def deploy_build(
     and subject to change."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.deploy import deploy_build_command
     deploy_build_command(workspace, image_name, force_rebuild, git_user_email, git_user_name)
 
 
@@ -1272,6 +1283,7 @@ def deploy_run(ctx, image_name: Optional[str], no_mount_ssh_keys: bool):
     and subject to change."""
     ns = ctx.obj
     workspace = find_and_load_workspace(ns.batch, ns.verbose, ns.workspace_dir)
+    from dataworkspaces.commands.deploy import deploy_run_command
     deploy_run_command(workspace, image_name, no_mount_ssh_keys)
 
 
@@ -1279,7 +1291,7 @@ deploy.add_command(deploy_run)
 
 
 @click.command()
-@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=DWS_PATHDIR)
+@click.option("--workspace-dir", type=WORKSPACE_PARAM, default=_find_containing_workspace)
 @click.option(
     "--resource",
     type=str,
@@ -1309,6 +1321,7 @@ def config(ctx, workspace_dir, resource, param_name, param_value):
                 "Please enter the workspace root dir", type=WORKSPACE_PARAM
             )
     workspace = find_and_load_workspace(ns.batch, ns.verbose, workspace_dir)
+    from dataworkspaces.commands.config import config_command
     config_command(workspace, param_name, param_value, resource)
 
 
@@ -4,6 +4,7 @@ Resource for git repositories
 """
 import subprocess
 import os
+import configparser
 from os.path import (
     realpath,
     basename,
@@ -17,18 +18,19 @@ from os.path import (
     commonpath,
     isabs,
 )
-import shutil
 import stat
+from contextlib import contextmanager
 import click
 import json
-from typing import Set, Pattern, Union, Optional, Tuple, cast, List
+from typing import Set, Pattern, Union, Optional, Tuple, cast, List, Iterator
 
 from dataworkspaces.errors import ConfigurationError, InternalError, PathError
-from dataworkspaces.utils.subprocess_utils import call_subprocess, call_subprocess_for_rc
+from dataworkspaces.utils.subprocess_utils import call_subprocess
 from dataworkspaces.utils.git_utils import (
     is_git_dirty,
     is_file_tracked_by_git,
     get_local_head_hash,
+    get_local_head_hash_and_branch,
     get_branch_info,
     commit_changes_in_repo,
     checkout_and_apply_commit,
@@ -36,12 +38,15 @@ from dataworkspaces.utils.git_utils import (
     is_git_repo,
     commit_changes_in_repo_subdir,
     checkout_subdir_and_apply_commit,
-    get_subdirectory_hash,
+    get_local_head_and_subdirectory_hash,
     is_pull_needed_from_remote,
+    git_commit_exists,
     git_remove_subtree,
     git_remove_file,
     git_commit,
     git_add,
+    git_add_all,
+    get_files_tracked_by_git,
     is_git_staging_dirty,
     switch_git_branch,
     switch_git_branch_if_needed,
@@ -69,6 +74,7 @@ from dataworkspaces.workspace import (
 import dataworkspaces.backends.git as git_backend
 from dataworkspaces.utils.file_utils import (
     LocalPathType,
+    copy_file,
     does_subpath_exist,
     get_subpath_from_absolute,
 )
@@ -80,6 +86,15 @@ from dataworkspaces.utils.snapshot_utils import (
 )
 
 
+def _is_tracked(
+    relpath: str, git_root: str, verbose: bool, tracked: Optional[Set[str]] = None
+) -> bool:
+    if tracked is not None:
+        return relpath in tracked
+    else:
+        return is_file_tracked_by_git(relpath, git_root, verbose)
+
+
 def git_move_and_add(srcabspath, destabspath, git_root, verbose):
     """
     Move a file that might or might not be tracked by git to
@@ -103,25 +118,45 @@ def git_move_and_add(srcabspath, destabspath, git_root, verbose):
     git_add(git_root, [destrelpath], verbose)
 
 
-def git_copy_and_add(srcabspath, destabspath, git_root, verbose):
+def git_add_moved_files(moved_files: List[Tuple[str, str]], git_root: str, verbose: bool) -> None:
+    """Stage a batch of files that were moved on the filesystem (e.g. by
+    move_current_files_local_fs()), given their (before, after) relative paths.
+    This has the same effect as calling git_move_and_add() on each file, but
+    we only run two git commands, no matter how many files were moved.
+    """
+    tracked = get_files_tracked_by_git(git_root, verbose)
+    add_paths = [dest for (src, dest) in moved_files]
+    # staging a tracked source path records its removal
+    add_paths.extend([src for (src, dest) in moved_files if src in tracked])
+    git_add_all(git_root, add_paths, verbose)
+
+
+def git_copy_and_add(srcabspath, destabspath, git_root, verbose, tracked=None, add_paths=None):
     """
     This is for an exported results resource.
     Copy a file that might or might not be tracked by git to
     a new location (snapshot directory), set it to read-only and make sure
     that it is now tracked by git. We add it to the original location if it is not
-    already in the repo.
+    already in the repo. When copying many files, pass in the tracked set from
+    get_files_tracked_by_git(), to avoid running git to check each file. If
+    add_paths is provided, the paths to be added are appended to it rather than
+    added here, so that the caller can add all the copied files with a single
+    call to git_add_all().
     """
     assert srcabspath.startswith(git_root)
     assert destabspath.startswith(git_root)
     srcrelpath = srcabspath[len(git_root) + 1 :]
     destrelpath = destabspath[len(git_root) + 1 :]
-    shutil.copyfile(srcabspath, destabspath)
+    copy_file(srcabspath, destabspath)
     add_files = [destrelpath]
-    if not is_file_tracked_by_git(srcrelpath, git_root, verbose):
+    if not _is_tracked(srcrelpath, git_root, verbose, tracked):
         add_files.append(srcrelpath)
     mode = os.stat(destabspath)[stat.ST_MODE]
     os.chmod(destabspath, mode & ~stat.S_IWUSR & ~stat.S_IWGRP & ~stat.S_IWOTH)
-    git_add(git_root, add_files, verbose)
+    if add_paths is not None:
+        add_paths.extend(add_files)
+    else:
+        git_add(git_root, add_files, verbose)
 
 
 class GitResourceBase(Resource, LocalStateResourceMixin, FileResourceMixin, SnapshotResourceMixin):
@@ -159,6 +194,39 @@ class GitResourceBase(Resource, LocalStateResourceMixin, FileResourceMixin, Snap
         self.local_path = self.param_defs.get("local_path", local_path)  # type: str
 
         self.repo_dir = repo_dir  # The root of the repo.
+        # Repo-relative paths of the results files waiting to be committed,
+        # only set within a buffered_results_files() block
+        self._pending_results_files = None  # type: Optional[List[str]]
+
+    @contextmanager
+    def buffered_results_files(self) -> Iterator[None]:
+        """Within this block, add_results_file() writes each file, but the files
+        are added to git and committed together at the end of the block.
+        """
+        if self._pending_results_files is not None:
+            yield  # nested block, the outer block will commit
+            return
+        self._pending_results_files = []
+        try:
+            yield
+            pending = self._pending_results_files
+        finally:
+            self._pending_results_files = None
+        self._commit_results_files(pending)
+
+    def _commit_results_files(self, rel_to_repo_paths: List[str]) -> None:
+        if len(rel_to_repo_paths) == 0:
+            return
+        git_add_all(self.repo_dir, rel_to_repo_paths, self.workspace.verbose)
+        git_commit(
+            self.repo_dir, "Added %s" % ", ".join(rel_to_repo_paths), verbose=self.workspace.verbose
+        )
+
+    def _add_results_file_to_git(self, rel_to_repo_path: str) -> None:
+        if self._pending_results_files is not None:
+            self._pending_results_files.append(rel_to_repo_path)
+        else:
+            self._commit_results_files([rel_to_repo_path])
 
     def get_local_path_if_any(self):
         return self.local_path
@@ -200,7 +268,7 @@ class GitResourceBase(Resource, LocalStateResourceMixin, FileResourceMixin, Snap
             raise ConfigurationError("Source file %s does not exist" % src_local_path)
         if not exists(parent_dir):
             os.makedirs(parent_dir)
-        shutil.copyfile(src_local_path, abs_dest_path)
+        copy_file(src_local_path, abs_dest_path)
         rel_to_repo_path = get_subpath_from_absolute(self.repo_dir, abs_dest_path)
         assert rel_to_repo_path is not None
         call_subprocess(
@@ -340,6 +408,24 @@ class GitRepoResource(GitResourceBase):
             ptype=BoolType(),
         )
         self.imported = self.param_defs.get("imported", imported)  # type: bool
+        # Set by _check_for_git_fat() on first use. Whether the repo is
+        # git-fat enabled does not change while a command is running.
+        self.uses_git_fat = None  # type: Optional[bool]
+        self.python2_exe = None  # type: Optional[str]
+
+    def _check_for_git_fat(self) -> bool:
+        """Return True if this repo is git-fat enabled, also finding the python2
+        executable needed to run git-fat. This is only checked once per resource.
+        """
+        if self.uses_git_fat is None:
+            if is_a_git_fat_repo(self.local_path):
+                import dataworkspaces.third_party.git_fat as git_fat
+
+                self.python2_exe = git_fat.find_python2_exe()
+                self.uses_git_fat = True
+            else:
+                self.uses_git_fat = False
+        return self.uses_git_fat
 
     def get_local_params(self):
         use_relative = (
@@ -363,14 +449,12 @@ class GitRepoResource(GitResourceBase):
             rel_dest_root,
             exclude_files,
             exclude_dirs_re,
-            move_fn=lambda src, dest: git_move_and_add(
-                src, dest, self.local_path, self.workspace.verbose
-            ),
             verbose=self.workspace.verbose,
         )
         # If there were no files in the results dir, then we do not
         # create a subdirectory for this snapshot
         if len(moved_files) > 0:
+            git_add_moved_files(moved_files, self.local_path, self.workspace.verbose)
             call_subprocess(
                 [GIT_EXE_PATH, "commit", "-m", "Move current results to %s" % rel_dest_root],
                 cwd=self.local_path,
@@ -382,6 +466,8 @@ class GitRepoResource(GitResourceBase):
     ):
         switch_git_branch_if_needed(self.local_path, self.branch, self.workspace.verbose)
         validate_git_fat_in_path_if_needed(self.local_path)
+        tracked = get_files_tracked_by_git(self.local_path, self.workspace.verbose)
+        add_paths = []  # type: List[str]
         copied_files = copy_current_files_local_fs(
             self.name,
             self.local_path,
@@ -389,10 +475,11 @@ class GitRepoResource(GitResourceBase):
             exclude_files,
             exclude_dirs_re,
             copy_fn=lambda src, dest: git_copy_and_add(
-                src, dest, self.local_path, self.workspace.verbose
+                src, dest, self.local_path, self.workspace.verbose, tracked, add_paths
             ),
             verbose=self.workspace.verbose,
         )
+        git_add_all(self.local_path, add_paths, self.workspace.verbose)
         # If there were no files in the results dir, then we do not
         # create a subdirectory for this snapshot
         if len(copied_files) > 0:
@@ -414,16 +501,7 @@ class GitRepoResource(GitResourceBase):
             os.makedirs(parent_dir)
         with open(abs_dest_path, "w") as f:
             json.dump(data, f, indent=2)
-        call_subprocess(
-            [GIT_EXE_PATH, "add", rel_dest_path],
-            cwd=self.local_path,
-            verbose=self.workspace.verbose,
-        )
-        call_subprocess(
-            [GIT_EXE_PATH, "commit", "-m", "Added %s" % rel_dest_path],
-            cwd=self.local_path,
-            verbose=self.workspace.verbose,
-        )
+        self._add_results_file_to_git(rel_dest_path)
 
     def snapshot_precheck(self):
         validate_git_fat_in_path_if_needed(self.local_path)
@@ -433,26 +511,19 @@ class GitRepoResource(GitResourceBase):
         commit_changes_in_repo(
             self.local_path, "autocommit ahead of snapshot", verbose=self.workspace.verbose
         )
-        switch_git_branch_if_needed(self.local_path, self.branch, self.workspace.verbose)
-        hashval = get_local_head_hash(self.local_path, self.workspace.verbose)
+        (hashval, current_branch) = get_local_head_hash_and_branch(
+            self.local_path, self.workspace.verbose
+        )
+        if current_branch != self.branch:
+            switch_git_branch_if_needed(self.local_path, self.branch, self.workspace.verbose)
+            hashval = get_local_head_hash(self.local_path, self.workspace.verbose)
         return (hashval, hashval)
 
     def restore_precheck(self, hashval):
-        rc = call_subprocess_for_rc(
-            [GIT_EXE_PATH, "cat-file", "-e", hashval + "^{commit}"],
-            cwd=self.local_path,
-            verbose=self.workspace.verbose,
-        )
-        if rc != 0:
+        if not git_commit_exists(self.local_path, hashval, verbose=self.workspace.verbose):
             raise ConfigurationError("No commit found with hash '%s' in %s" % (hashval, str(self)))
-        if is_a_git_fat_repo(self.local_path):
-            import dataworkspaces.third_party.git_fat as git_fat
-
-            self.python2_exe = git_fat.find_python2_exe()
-            self.uses_git_fat = True
+        if self._check_for_git_fat():
             validate_git_fat_in_path()
-        else:
-            self.uses_git_fat = False
 
     def restore(self, hashval):
         commit_changes_in_repo(
@@ -481,13 +552,7 @@ class GitRepoResource(GitResourceBase):
             raise ConfigurationError(
                 "Resource '%s' requires a pull from the remote origin before pushing." % self.name
             )
-        if is_a_git_fat_repo(self.local_path):
-            import dataworkspaces.third_party.git_fat as git_fat
-
-            self.python2_exe = git_fat.find_python2_exe()
-            self.uses_git_fat = True
-        else:
-            self.uses_git_fat = False
+        self._check_for_git_fat()
 
     def push(self):
         """Push to remote origin, if any"""
@@ -513,13 +578,7 @@ class GitRepoResource(GitResourceBase):
                 "Git repo at %s has uncommitted changes. Please commit your changes before pulling."
                 % self.local_path
             )
-        if is_a_git_fat_repo(self.local_path):
-            import dataworkspaces.third_party.git_fat as git_fat
-
-            self.python2_exe = git_fat.find_python2_exe()
-            self.uses_git_fat = True
-        else:
-            self.uses_git_fat = False
+        self._check_for_git_fat()
 
     def pull(self):
         """Pull from remote origin, if any"""
@@ -540,7 +599,37 @@ class GitRepoResource(GitResourceBase):
         return "Git repository %s in role '%s'" % (self.local_path, self.role)
 
 
+def _read_remote_origin_from_git_config(local_path: str) -> Optional[str]:
+    """Try to read the remote origin url directly from the repo's .git/config file,
+    avoiding a call to git. We only handle the simple, common layout of the file.
+    If there is anything we are not sure about (includes, quoting, a .git file
+    rather than a directory, GIT_DIR set, etc.), we return None and the caller
+    falls back to asking git.
+    """
+    config_path = join(local_path, ".git", "config")
+    if "GIT_DIR" in os.environ or "GIT_CONFIG" in os.environ or not isfile(config_path):
+        return None
+    parser = configparser.RawConfigParser(strict=False)
+    try:
+        parser.read(config_path, encoding="utf-8")
+    except (configparser.Error, UnicodeDecodeError):
+        return None
+    url = None
+    for section in parser.sections():
+        name = section.lower()
+        if name.startswith("include"):
+            return None
+        elif (name.startswith("remote ") and section[7:] == '"origin"') or name == "remote.origin":
+            url = parser.get(section, "url", fallback=url)
+    if url is None or any(c in url for c in "\"#;"):
+        return None
+    return url
+
+
 def get_remote_origin(local_path, verbose=False):
+    url = _read_remote_origin_from_git_config(local_path)
+    if url is not None:
+        return url
     args = [GIT_EXE_PATH, "config", "--get", "remote.origin.url"]
     if verbose:
         click.echo(" ".join(args) + " [run in %s]" % local_path)
@@ -588,11 +677,8 @@ class GitRepoFactory(ResourceFactory):
         arguments"""
         workspace.validate_local_path_for_resource(name, local_path)
         lpr = realpath(local_path)
-        wspath = (
-            realpath(workspace.get_workspace_local_path_if_any())
-            if workspace.get_workspace_local_path_if_any() is not None
-            else None
-        )
+        workspace_local_path = workspace.get_workspace_local_path_if_any()
+        wspath = workspace.get_workspace_real_path_if_any()
         if not is_git_repo(local_path):
             if (
                 isinstance(workspace, git_backend.Workspace)
@@ -623,9 +709,7 @@ class GitRepoFactory(ResourceFactory):
             isinstance(workspace, git_backend.Workspace)
             and wspath is not None
             and lpr.startswith(wspath)
-            and is_file_tracked_by_git(
-                local_path, workspace.get_workspace_local_path_if_any(), verbose=workspace.verbose
-            )
+            and is_file_tracked_by_git(local_path, workspace_local_path, verbose=workspace.verbose)
         ):
             raise ConfigurationError(
                 "%s is a git repository, but also part of the parent workspace's repo"
@@ -838,14 +922,12 @@ class GitRepoResultsSubdirResource(GitResourceBase):
             rel_dest_root,
             exclude_files,
             exclude_dirs_re,
-            move_fn=lambda src, dest: git_move_and_add(
-                src, dest, self.local_path, self.workspace.verbose
-            ),
             verbose=self.workspace.verbose,
         )
         # If there were no files in the results dir, then we do not
         # create a subdirectory for this snapshot
         if len(moved_files) > 0:
+            git_add_moved_files(moved_files, self.local_path, self.workspace.verbose)
             call_subprocess(
                 [
                     GIT_EXE_PATH,
@@ -863,6 +945,8 @@ class GitRepoResultsSubdirResource(GitResourceBase):
         self, rel_dest_root: str, exclude_files: Set[str], exclude_dirs_re: Pattern
     ):
         validate_git_fat_in_path_if_needed(self.workspace_dir)
+        tracked = get_files_tracked_by_git(self.local_path, self.workspace.verbose)
+        add_paths = []  # type: List[str]
         copied_files = copy_current_files_local_fs(
             self.name,
             self.local_path,
@@ -870,10 +954,11 @@ class GitRepoResultsSubdirResource(GitResourceBase):
             exclude_files,
             exclude_dirs_re,
             copy_fn=lambda src, dest: git_copy_and_add(
-                src, dest, self.local_path, self.workspace.verbose
+                src, dest, self.local_path, self.workspace.verbose, tracked, add_paths
             ),
             verbose=self.workspace.verbose,
         )
+        git_add_all(self.local_path, add_paths, self.workspace.verbose)
         # If there were no files in the results dir, then we do not
         # create a subdirectory for this snapshot
         if len(copied_files) > 0:
@@ -896,12 +981,10 @@ class GitRepoResultsSubdirResource(GitResourceBase):
     def snapshot(self):
         # The subdirectory hash is used for comparison and the head
         # hash used for restoring
-        return (
-            get_subdirectory_hash(
-                self.workspace_dir, self.relative_path, verbose=self.workspace.verbose
-            ),
-            get_local_head_hash(self.workspace_dir, verbose=self.workspace.verbose),
+        (head_hash, subdir_hash) = get_local_head_and_subdirectory_hash(
+            self.workspace_dir, self.relative_path, verbose=self.workspace.verbose
         )
+        return (subdir_hash, head_hash)
 
     def restore_precheck(self, hashval):
         raise ConfigurationError(
@@ -927,17 +1010,7 @@ class GitRepoResultsSubdirResource(GitResourceBase):
             os.makedirs(parent_dir)
         with open(abs_dest_path, "w") as f:
             json.dump(data, f, indent=2)
-        rel_to_repo_path = join(self.relative_path, rel_dest_path)
-        call_subprocess(
-            [GIT_EXE_PATH, "add", rel_to_repo_path],
-            cwd=self.workspace_dir,
-            verbose=self.workspace.verbose,
-        )
-        call_subprocess(
-            [GIT_EXE_PATH, "commit", "-m", "Added %s" % rel_to_repo_path],
-            cwd=self.workspace_dir,
-            verbose=self.workspace.verbose,
-        )
+        self._add_results_file_to_git(join(self.relative_path, rel_dest_path))
 
     def push_precheck(self):
         if not exists(self.local_path):
@@ -963,7 +1036,8 @@ class GitRepoResultsSubdirResource(GitResourceBase):
         pass  # push will happen at workspace level
 
     def pull_precheck(self):
-        if is_git_dirty(self.local_path):
+        # git status covers the whole repo, so check the workspace repo itself
+        if is_git_dirty(self.workspace_dir):
             raise ConfigurationError(
                 "Git repo at %s has uncommitted changes. Please commit your changes before pulling."
                 % self.workspace_dir
@@ -1030,17 +1104,7 @@ class GitRepoSubdirResource(GitResourceBase):
             os.makedirs(parent_dir)
         with open(abs_dest_path, "w") as f:
             json.dump(data, f, indent=2)
-        rel_to_repo_path = join(self.relative_path, rel_dest_path)
-        call_subprocess(
-            [GIT_EXE_PATH, "add", rel_to_repo_path],
-            cwd=self.workspace_dir,
-            verbose=self.workspace.verbose,
-        )
-        call_subprocess(
-            [GIT_EXE_PATH, "commit", "-m", "Added %s" % rel_to_repo_path],
-            cwd=self.workspace_dir,
-            verbose=self.workspace.verbose,
-        )
+        self._add_results_file_to_git(join(self.relative_path, rel_dest_path))
 
     def snapshot_precheck(self):
         validate_git_fat_in_path_if_needed(self.workspace_dir)
@@ -1055,21 +1119,14 @@ class GitRepoSubdirResource(GitResourceBase):
             "autocommit ahead of snapshot",
             verbose=self.workspace.verbose,
         )
-        return (
-            get_subdirectory_hash(
-                self.workspace_dir, self.relative_path, verbose=self.workspace.verbose
-            ),
-            get_local_head_hash(self.workspace_dir, verbose=self.workspace.verbose),
+        (head_hash, subdir_hash) = get_local_head_and_subdirectory_hash(
+            self.workspace_dir, self.relative_path, verbose=self.workspace.verbose
         )
+        return (subdir_hash, head_hash)
 
     def restore_precheck(self, hashval):
         validate_git_fat_in_path_if_needed(self.workspace_dir)
-        rc = call_subprocess_for_rc(
-            [GIT_EXE_PATH, "cat-file", "-e", hashval + "^{commit}"],
-            cwd=self.workspace_dir,
-            verbose=self.workspace.verbose,
-        )
-        if rc != 0:
+        if not git_commit_exists(self.workspace_dir, hashval, verbose=self.workspace.verbose):
             raise ConfigurationError("No commit found with hash '%s' in %s" % (hashval, str(self)))
 
     def restore(self, hashval):
@@ -1102,7 +1159,9 @@ class GitRepoSubdirResource(GitResourceBase):
                 "Git repo at %s has uncommitted changes. Please commit your changes before pushing."
                 % self.local_path
             )
-        if is_pull_needed_from_remote(self.local_path, self.get_branch(), self.workspace.verbose):
+        # ask about the workspace repo itself, so that the answer is shared
+        # with the workspace's own precheck
+        if is_pull_needed_from_remote(self.workspace_dir, self.get_branch(), self.workspace.verbose):
             raise ConfigurationError(
                 "Resource '%s' requires a pull from the remote origin before pushing." % self.name
             )
@@ -1114,7 +1173,7 @@ class GitRepoSubdirResource(GitResourceBase):
         #                         cwd=self.local_path, verbose=self.verbose)
 
     def pull_precheck(self):
-        if is_git_dirty(self.local_path):
+        if is_git_dirty(self.workspace_dir):
             raise ConfigurationError(
                 "Git repo at %s has uncommitted changes. Please commit your changes before pulling."
                 % self.local_path
@@ -1173,7 +1232,7 @@ class GitRepoSubdirFactory(ResourceFactory):
         workspace_dir = _get_workspace_dir_for_git_backend(workspace)
         validate_git_fat_in_path_if_needed(workspace_dir)
         ensure_git_lfs_configured_if_needed(workspace_dir, verbose=workspace.verbose)
-        wdr = realpath(workspace_dir)
+        wdr = workspace.get_workspace_real_path_if_any()
         if not lpr.startswith(wdr):
             raise ConfigurationError(
                 "Git subdirectories can only be used as resources when under the workspace repo."
@@ -1229,11 +1288,13 @@ class GitRepoSubdirFactory(ResourceFactory):
         # this should be redundant, as we already intialized for the parent repo, but run just in case.
         ensure_git_lfs_configured_if_needed(workspace_dir, verbose=workspace.verbose)
         local_path = join(workspace_dir, relative_path)
-        if not exists(local_path):
+        try:
+            os.mkdir(local_path)
             # this subdirectory most have been created in the remote
             # resource. We can just wait for the "git pull" to populate the
-            # the contents, but will create a placeholder so our checks pass.
-            os.mkdir(local_path)
+            # the contents, but have created a placeholder so our checks pass.
+        except FileExistsError:
+            pass
         if role == ResourceRoles.RESULTS:
             return GitRepoResultsSubdirResource(
                 rname, workspace, relative_path, params.get("export", False)
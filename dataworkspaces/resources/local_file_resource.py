@@ -13,7 +13,7 @@ import click
 
 from dataworkspaces.errors import ConfigurationError, PathError
 from dataworkspaces.utils.subprocess_utils import call_subprocess
-from dataworkspaces.utils.file_utils import does_subpath_exist, LocalPathType
+from dataworkspaces.utils.file_utils import does_subpath_exist, LocalPathType, copy_file
 from dataworkspaces.utils.git_utils import GIT_EXE_PATH, is_git_staging_dirty
 from dataworkspaces.workspace import (
     Workspace,
@@ -184,7 +184,7 @@ class LocalFileResource(
             raise ConfigurationError("Source file %s does not exist." % local_path)
         if not os.path.isdir(parent_dir):
             os.makedirs(parent_dir)
-        shutil.copyfile(local_path, rel_dest_path)
+        copy_file(local_path, abs_dest_path)
 
     def does_subpath_exist(
         self, subpath: str, must_be_file: bool = False, must_be_directory: bool = False
@@ -308,7 +308,6 @@ class LocalFileResource(
                 verbose=self.workspace.verbose,
             )
         if not rc:
-            print("ERROR IN RESTORE")
             raise ConfigurationError("Local file structure not compatible with saved hash")
 
     def restore(self, hashval):
@@ -1,5 +1,7 @@
 # Copyright 2018,2019 by MPI-SWS and Data-ken Research. Licensed under Apache 2.0. See LICENSE.txt.
 
+from importlib.util import find_spec
+
 # The resource factory registry
 RESOURCE_TYPES = {}
 
@@ -30,9 +32,9 @@ from dataworkspaces.resources.api_resource import ApiResourceFactory, API_RESOUR
 register_resource_type(API_RESOURCE_TYPE, ApiResourceFactory)
 
 
-try:
+# The s3 resource's dependencies are optional and slow to import, so we just
+# check that they are installed. The s3 resource module imports them when used.
+if find_spec("s3fs") is not None and find_spec("boto3") is not None:
     from dataworkspaces.resources.s3.s3_resource \
         import S3_RESOURCE_TYPE, S3ResourceFactory
     register_resource_type(S3_RESOURCE_TYPE, S3ResourceFactory)
-except ImportError:
-    pass # dependencies not installed
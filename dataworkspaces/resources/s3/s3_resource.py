@@ -3,10 +3,11 @@
 Resource for files living in a local directory 
 """
 import os
+import posixpath
 from os.path import join, exists
-from typing import Pattern, Tuple, Optional, Set, Union, List
+from collections import OrderedDict
+from typing import Any, Pattern, Tuple, Optional, Set, Union, List
 
-from s3fs import S3FileSystem # type: ignore
 
 
 from dataworkspaces.errors import ConfigurationError, NotSupportedError, InternalError, PathError
@@ -23,9 +24,10 @@ from dataworkspaces.workspace import (
 )
 
 from dataworkspaces.utils.param_utils import StringType
+from dataworkspaces.utils.file_utils import write_file_atomically
 
 from dataworkspaces.resources.s3.snapfs import S3Snapshot
-from dataworkspaces.resources.s3.snapshot import snapshot_multiprocess
+from dataworkspaces.resources.s3.snapshot import snapshot_multiprocess, SNAPSHOTS_SUBDIR
 
 S3_RESOURCE_TYPE = "s3"
 
@@ -33,6 +35,38 @@ S3_RESOURCE_TYPE = "s3"
 # For anything specific to results resources, we throw this error
 RESULTS_ROLE_NOT_SUPPORTED=NotSupportedError(f"{ResourceRoles.RESULTS} not currently supported for S3 resources")
 
+# Snapshots are named by the hash of their contents and never change, so once
+# loaded, we keep the most recently used ones in memory, keyed by (bucket, hash).
+MAX_LOADED_SNAPSHOTS = 4
+_loaded_snapshots = OrderedDict() # type: OrderedDict[Tuple[str, str], S3Snapshot]
+
+# Limit on the total size of the downloaded snapshot files we keep in the
+# snapshot cache directory. We remove the least recently used files beyond this.
+MAX_SNAPSHOT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Used by upload_file(): files above the threshold are uploaded as a multipart
+# upload, with several parts in flight at once. These are boto3 TransferConfig settings.
+UPLOAD_TRANSFER_SETTINGS = dict(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True,
+)
+
+
+def _make_s3fs(version_aware:bool=False) -> Any:
+    """s3fs and boto3 take a long time to import, so we only import them when
+    an S3 resource is actually used, rather than whenever the resource types are loaded.
+    """
+    from s3fs import S3FileSystem # type: ignore
+    return S3FileSystem(version_aware=version_aware)
+
+
+def _remember_loaded_snapshot(bucket_name:str, snapshot_hash:str, snapshot_fs:S3Snapshot) -> None:
+    _loaded_snapshots[(bucket_name, snapshot_hash)] = snapshot_fs
+    if len(_loaded_snapshots) > MAX_LOADED_SNAPSHOTS:
+        _loaded_snapshots.popitem(last=False)
+
 
 class S3Resource(
     Resource, LocalStateResourceMixin, FileResourceMixin, SnapshotResourceMixin
@@ -71,31 +105,86 @@ class S3Resource(
         self.current_snapshot_file = join(self.local_scratch_dir, 'current_snapshot.txt')
         self.current_snapshot = None # type: Optional[str]
         self.snapshot_fs = None # type: Optional[S3Snapshot]
+        self._s3_client = None # type: Any # boto3 client for uploads, created when first needed
         # we cache snapshot files in a subdirectory of the scratch dir
         self.snapshot_cache_dir = join(self.local_scratch_dir, "snapshot_cache")
         # Make sure it exists.
         if not exists(self.snapshot_cache_dir):
             os.makedirs(self.snapshot_cache_dir)
 
-        if exists(self.current_snapshot_file):
+        try:
             with open(self.current_snapshot_file, 'r') as f:
                 self.current_snapshot = f.read().strip()
-            self.fs = S3FileSystem(version_aware=True)
+        except FileNotFoundError:
+            pass # no snapshot selected
+        if self.current_snapshot is not None:
+            self.fs = _make_s3fs(version_aware=True)
             self.snapshot_fs = self._load_snapshot(self.current_snapshot)
         else:
-            self.fs = S3FileSystem()
+            self.fs = _make_s3fs()
 
 
-    def _load_snapshot(self, snapshot_hash:str) -> S3Snapshot:
+    def _s3_path(self, rel_path:str) -> str:
+        """Return the S3FileSystem path for rel_path in our bucket. S3 keys
+        always use forward slashes, so we do not use os.path.join() here.
+        """
+        return posixpath.join(self.bucket_name, rel_path)
+
+    def _snapshot_s3_path(self, snapshot_hash:str) -> str:
+        return posixpath.join(self.bucket_name, SNAPSHOTS_SUBDIR, snapshot_hash+'.json.gz')
+
+    def _get_snapshot_file(self, snapshot_hash:str) -> str:
+        """Return the local path of the snapshot file in our cache, downloading
+        it if needed. Raises FileNotFoundError if the snapshot is not in the bucket.
+        """
         snapshot_file = snapshot_hash+'.json.gz'
         snapshot_local_path = join(self.snapshot_cache_dir, snapshot_file)
-        if not exists(snapshot_local_path):
-            snapshot_s3_path = join(join(self.bucket_name, '.snapshots'),
-                                    snapshot_file)
-            if not self.fs.exists(snapshot_s3_path):
-                raise InternalError(f"File s3://{snapshot_s3_path} not found for snapshot {snapshot_hash}")
-            self.fs.get(snapshot_s3_path, snapshot_local_path)
-        return S3Snapshot.read_snapshot_from_file(snapshot_local_path)
+        if exists(snapshot_local_path):
+            os.utime(snapshot_local_path) # mark as recently used
+            return snapshot_local_path
+        snapshot_s3_path = self._snapshot_s3_path(snapshot_hash)
+        # download to a temporary name, so that we never cache a partial file
+        tmp_path = snapshot_local_path + '.tmp'
+        try:
+            self.fs.get(snapshot_s3_path, tmp_path)
+            os.replace(tmp_path, snapshot_local_path)
+        finally:
+            if exists(tmp_path):
+                os.remove(tmp_path)
+        self._trim_snapshot_cache(keep=snapshot_local_path)
+        return snapshot_local_path
+
+    def _trim_snapshot_cache(self, keep:str) -> None:
+        """Remove the least recently used snapshot files until the cache
+        is within MAX_SNAPSHOT_CACHE_BYTES. They can be downloaded again if needed.
+        """
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.snapshot_cache_dir):
+            if entry.name.endswith('.json.gz') and entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total_bytes += st.st_size
+        entries.sort()
+        for (_, size, path) in entries:
+            if total_bytes <= MAX_SNAPSHOT_CACHE_BYTES:
+                break
+            if path != keep:
+                os.remove(path)
+                total_bytes -= size
+
+    def _load_snapshot(self, snapshot_hash:str) -> S3Snapshot:
+        key = (self.bucket_name, snapshot_hash)
+        if key in _loaded_snapshots:
+            _loaded_snapshots.move_to_end(key)
+            return _loaded_snapshots[key]
+        try:
+            snapshot_local_path = self._get_snapshot_file(snapshot_hash)
+        except FileNotFoundError as e:
+            raise InternalError(f"File for snapshot {snapshot_hash} not found in bucket {self.bucket_name}") from e
+        snapshot_fs = S3Snapshot.read_snapshot_from_file(snapshot_local_path)
+        _remember_loaded_snapshot(self.bucket_name, snapshot_hash, snapshot_fs)
+        return snapshot_fs
 
     def __repr__(self):
         return f"S3Resource(name={self.name}, role={self.role}, bucket_name={self.bucket_name},\n"+\
@@ -131,9 +220,19 @@ class S3Resource(
         on the resource implmentation
         """
         self._verify_no_snapshot()
-        if not exists(local_path):
-            raise PathError("Source file %s does not exist." % local_path)
-        self.fs.put(local_path, join(self.bucket_name, rel_dest_path))
+        # We use boto3's managed transfer rather than S3FileSystem.put(), as
+        # it uploads the parts of large files in parallel.
+        import boto3 # type: ignore
+        from boto3.s3.transfer import TransferConfig # type: ignore
+        if self._s3_client is None:
+            self._s3_client = boto3.client('s3')
+        try:
+            self._s3_client.upload_file(local_path, self.bucket_name, rel_dest_path,
+                                        Config=TransferConfig(**UPLOAD_TRANSFER_SETTINGS))
+        except FileNotFoundError as e:
+            raise PathError("Source file %s does not exist." % local_path) from e
+        # S3FileSystem caches listings, and did not see this upload
+        self.fs.invalidate_cache(self._s3_path(rel_dest_path))
 
     def does_subpath_exist(
         self, subpath: str, must_be_file: bool = False, must_be_directory: bool = False
@@ -151,18 +250,21 @@ class S3Resource(
             else:
                 return True
         else:
-            path = join(self.bucket_name, subpath)
-            if not self.fs.exists(path):
+            # A single info() call tells us both whether the path exists
+            # and its type, rather than separate exists() and isfile() calls.
+            try:
+                info = self.fs.info(self._s3_path(subpath))
+            except FileNotFoundError:
                 return False
-            elif must_be_file:
-                return self.fs.isfile(path)
+            if must_be_file:
+                return info['type']=='file'
             elif must_be_directory:
-                return not self.fs.isfile(path)
+                return info['type']!='file'
             else:
                 return True
 
     def open(self, rel_path:str, mode:str):
-        path = join(self.bucket_name, rel_path)
+        path = self._s3_path(rel_path)
         if self.current_snapshot:
             if mode not in ('r', 'rb'):
                 raise NotSupportedError("Cannot open a snapshot file in write mode")
@@ -187,13 +289,13 @@ class S3Resource(
             baselen = len(base)
             return [
                 entry[baselen:] for entry in
-                self.fs.ls(join(self.bucket_name, rel_path))
+                self.fs.ls(self._s3_path(rel_path))
                 if not entry[baselen:].startswith('.snapshots')
                 and not entry[baselen:]==rel_path]
 
     def delete_file(self, rel_path: str) -> None:
         self._verify_no_snapshot()
-        self.fs.rm(join(self.bucket_name, rel_path))
+        self.fs.rm(self._s3_path(rel_path))
 
     def read_results_file(self, subpath: str) -> JSONDict:
         """Read and parse json results data from the specified path
@@ -228,9 +330,15 @@ class S3Resource(
     def snapshot_precheck(self) -> None:
         pass
 
+    def _set_current_snapshot_file(self, snapshot_hash:str) -> None:
+        """Save the current snapshot hash. We replace the file atomically, as a
+        truncated file would leave the resource unusable.
+        """
+        write_file_atomically(self.current_snapshot_file, snapshot_hash.encode('utf-8'))
+
     def _ensure_fs_version_enabled(self):
         if not self.fs.version_aware:
-            self.fs = S3FileSystem(version_aware=True)
+            self.fs = _make_s3fs(version_aware=True)
 
     def snapshot(self) -> Tuple[Optional[str], Optional[str]]:
         if self.current_snapshot is not None:
@@ -238,39 +346,42 @@ class S3Resource(
             return (self.current_snapshot, self.current_snapshot)
         else:
             self.current_snapshot, versions = snapshot_multiprocess(self.bucket_name, self.snapshot_cache_dir)
-            with open(self.current_snapshot_file, 'w') as f:
-                f.write(self.current_snapshot)
+            self._set_current_snapshot_file(self.current_snapshot)
             self.snapshot_fs = S3Snapshot(versions)
+            _remember_loaded_snapshot(self.bucket_name, self.current_snapshot, self.snapshot_fs)
             self._ensure_fs_version_enabled()
             return (self.current_snapshot, self.current_snapshot)
 
     def restore_precheck(self, hashval):
-        snapshot_file = hashval+'.json.gz'
-        snapshot_local_path = join(self.snapshot_cache_dir, snapshot_file)
-        if not exists(snapshot_local_path):
-            snapshot_s3_path = join(join(self.bucket_name, '.snapshots'),
-                                    snapshot_file)
-            if not self.fs.exists(snapshot_s3_path):
-                raise ConfigurationError(f"File s3://{snapshot_s3_path} not found for snapshot {hashval}")
+        # Rather than just checking that the snapshot file exists, we download it
+        # into the cache, where restore() will find it.
+        try:
+            self._get_snapshot_file(hashval)
+        except FileNotFoundError as e:
+            snapshot_s3_path = self._snapshot_s3_path(hashval)
+            raise ConfigurationError(f"File s3://{snapshot_s3_path} not found for snapshot {hashval}") from e
 
     def restore(self, hashval):
         self.snapshot_fs = self._load_snapshot(hashval)
-        self.current_snapshot = hashval
-        with open(self.current_snapshot_file, 'w') as f:
-            f.write(hashval)
+        if hashval != self.current_snapshot:
+            self.current_snapshot = hashval
+            self._set_current_snapshot_file(hashval)
         self._ensure_fs_version_enabled()
 
     def delete_snapshot(
         self, workspace_snapshot_hash: str, resource_restore_hash: str, relative_path: str
     ) -> None:
+        _loaded_snapshots.pop((self.bucket_name, resource_restore_hash), None)
         snapshot_file = resource_restore_hash+'.json.gz'
         snapshot_local_path = join(self.snapshot_cache_dir, snapshot_file)
         if exists(snapshot_local_path):
             os.remove(snapshot_local_path)
-        snapshot_s3_path = join(join(self.bucket_name, '.snapshots'),
-                                snapshot_file)
-        if  self.fs.exists(snapshot_s3_path):
+        snapshot_s3_path = self._snapshot_s3_path(resource_restore_hash)
+        # no need for a separate exists() request, rm() tells us if it is missing
+        try:
             self.fs.rm(snapshot_s3_path)
+        except FileNotFoundError:
+            pass
         if self.current_snapshot==resource_restore_hash:
             os.remove(self.current_snapshot_file)
 
@@ -280,7 +391,7 @@ class S3Resource(
             assert self.snapshot_fs is not None
             if not self.snapshot_fs.exists(subpath):
                 raise ConfigurationError(f"Subpath {subpath} does not existing in bucket {self.bucket_name} as of snapshot {self.current_snapshot}")
-        elif not self.fs.exists(subpath):
+        elif not self.does_subpath_exist(subpath):
             raise ConfigurationError(f"Subpath {subpath} does not currently exist in bucket {self.bucket_name}")
 
 
@@ -4,17 +4,20 @@ Run S3 fs against a snapshot
 
 import sys
 import argparse
-import json
 import gzip
 
 from dataworkspaces.errors import PathError
+from dataworkspaces.utils.json_utils import loads as json_loads
 
 
 class Directory:
-    __slots__ = ('path', 'entries', 'subdirs')
+    # entries keeps the names in order for ls(), names is a set of the same
+    # names, so that lookups do not need to scan the list.
+    __slots__ = ('path', 'entries', 'names', 'subdirs')
     def __init__(self, path):
         self.path = path
         self.entries = []
+        self.names = set()
         self.subdirs = {}
 
     def ensure_subdir(self, name):
@@ -27,10 +30,12 @@ class Directory:
             subdir = Directory(subdir_path)
             self.subdirs[name] = subdir
             self.entries.append(name)
+            self.names.add(name)
             return subdir
 
     def add_file(self, name):
         self.entries.append(name)
+        self.names.add(name)
 
     def ls(self, path):
         if path=="" and self.path=="":
@@ -44,7 +49,7 @@ class Directory:
         leaf = parts[-1]
         def join(p, name):
             return name if p=="" else p + "/" + name
-        if leaf not in parent.entries:
+        if leaf not in parent.names:
             raise PathError(f"Path {path} not present in snapshot")
         if leaf in parent.subdirs:
             return [join(join(parent.path, leaf), entry) for entry in parent.subdirs[leaf].entries]
@@ -59,7 +64,7 @@ class Directory:
                 return False
             parent = parent.subdirs[part]
         leaf = parts[-1]
-        return leaf in parent.entries
+        return leaf in parent.names
 
     def isfile(self, path):
         parts = path.split("/")
@@ -69,7 +74,7 @@ class Directory:
                 return False
             parent = parent.subdirs[part]
         leaf = parts[-1]
-        return (leaf in parent.entries) and (leaf not in parent.subdirs)
+        return (leaf in parent.names) and (leaf not in parent.subdirs)
 
     def __repr__(self):
         if len(self.entries)>5:
@@ -93,19 +98,27 @@ class Directory:
         
 def build_file_tree(snapshot):
     tree = Directory("")
+    # The snapshot keys are sorted, so consecutive keys are usually in the
+    # same directory. In that case, we reuse the directory from the previous
+    # key rather than walking down from the root again.
+    last_dirpath = None
+    parent = tree
     for key in snapshot.keys():
-        parts = key.split('/')
-        parent = tree
-        for part in parts[0:-1]:
-            parent = parent.ensure_subdir(part)
-        parent.add_file(parts[-1])
+        (dirpath, _, filename) = key.rpartition('/')
+        if dirpath != last_dirpath:
+            parent = tree
+            if dirpath != '':
+                for part in dirpath.split('/'):
+                    parent = parent.ensure_subdir(part)
+            last_dirpath = dirpath
+        parent.add_file(filename)
     return tree
 
 
 def read_snapshot(filename):
     with open(filename, 'rb') as f:
-        raw_data = gzip.decompress(f.read()).decode('utf-8')
-    return json.loads(raw_data)
+        raw_data = gzip.decompress(f.read())
+    return json_loads(raw_data)
 
 class S3Snapshot:
     def __init__(self, snapshot):
@@ -1,23 +1,26 @@
 
-import boto3 # type: ignore
-from multiprocessing import Process, JoinableQueue, Queue, cpu_count
+from threading import Thread
+from queue import Queue
 import time
 import json
 import argparse
 import sys
 import gzip
+import posixpath
 from os.path import join
 
 from dataworkspaces.utils.hash_utils import hash_bytes
 
-CPU_COUNT=cpu_count()
+# The crawl is just waiting on S3 list requests, so we use threads rather than
+# processes, and more of them than we have CPUs.
+DEFAULT_NUM_WORKERS=32
 
 SNAPSHOTS_SUBDIR=".snapshots"
 SNAPSHOTS_PREFIX=".snapshots/" # when getting the list of prefixes from s3, there is a trailing slash
 
-class VersionWorker(Process):
+class VersionWorker(Thread):
     def __init__(self, work_q, result_q, bucket, max_keys, max_depth):
-        super().__init__()
+        super().__init__(daemon=True)
         self.work_q = work_q
         self.result_q = result_q
         self.bucket = bucket
@@ -74,7 +77,9 @@ class VersionWorker(Process):
                 break
 
     def run(self):
-        self.client = boto3.client('s3')
+        import boto3 # type: ignore
+        # boto3's default session is not thread safe, so each thread creates its own
+        self.client = boto3.session.Session().client('s3')
         while True:
             prefix, depth = self.work_q.get()
             if prefix==None:
@@ -83,12 +88,13 @@ class VersionWorker(Process):
             self.get_at_prefix(prefix, depth)
             self.work_q.task_done()
 
-def snapshot_multiprocess(bucket, snapshot_dir, max_keys=1000, num_workers=CPU_COUNT, max_depth=2, dry_run=False):
+def snapshot_multiprocess(bucket, snapshot_dir, max_keys=1000, num_workers=DEFAULT_NUM_WORKERS, max_depth=2, dry_run=False):
     """Compute the snapshot and store as a hash in the specified directory.
     The filename will be HASH.json.gz. The hashing occurs before compresssing.
-    Returns the hashcode and the versions directory."""
+    Returns the hashcode and the versions directory. The bucket is listed by
+    num_workers threads in parallel."""
     start = time.time()
-    work_q = JoinableQueue() # type: JoinableQueue
+    work_q = Queue() # type: Queue
     work_q.put(('', 0))
     result_q = Queue() # type: Queue
     workers = [VersionWorker(work_q, result_q, bucket, max_keys, max_depth) for i in range(num_workers)]
@@ -114,7 +120,7 @@ def snapshot_multiprocess(bucket, snapshot_dir, max_keys=1000, num_workers=CPU_C
     if not dry_run:
         import s3fs # type: ignore
         fs = s3fs.S3FileSystem()
-        snapshot_path = join(join(bucket, SNAPSHOTS_SUBDIR), f'{hashcode}.json.gz')
+        snapshot_path = posixpath.join(bucket, SNAPSHOTS_SUBDIR, f'{hashcode}.json.gz')
         fs.put(local_file, snapshot_path)
         print(f"Uploaded snapshot to s3://{snapshot_path}")
     end = time.time()
@@ -126,8 +132,8 @@ def snapshot_multiprocess(bucket, snapshot_dir, max_keys=1000, num_workers=CPU_C
 # just for testing
 def main(argv=sys.argv[1:]):
     parser = argparse.ArgumentParser()
-    parser.add_argument('--workers', default=CPU_COUNT, type=int,
-                        help=f"Number of workers, defaults to number of CPUs ({CPU_COUNT})")
+    parser.add_argument('--workers', default=DEFAULT_NUM_WORKERS, type=int,
+                        help=f"Number of worker threads, defaults to {DEFAULT_NUM_WORKERS}")
     parser.add_argument('--max-keys', default=1000, type=int,
                         help="Maximum keys per request, defaults to 1000")
     parser.add_argument('--max-depth', default=2, type=int,
@@ -41,7 +41,14 @@ Please make sure that you have Python 2.7 or Python 2.6 installed and
 the conrtaining directory referenced on your PATH environment variable.
 """
 
+# Cache of the python2 executable found by find_python2_exe(), so that we
+# only probe the candidate executables once per process.
+_python2_exe = None # type: Optional[str]
+
 def find_python2_exe():
+    global _python2_exe
+    if _python2_exe is not None:
+        return _python2_exe
     dirpaths = os.environ['PATH'].split(os.pathsep)
     for dirpath in STANDARD_EXE_SEARCH_LOCATIONS:
         if dirpath not in dirpaths:
@@ -52,6 +59,7 @@ def find_python2_exe():
             exe_path = join(dirpath, exe_name)
             if isfile(exe_path) and os.access(exe_path, os.X_OK):
                 if _is_python2(exe_path):
+                    _python2_exe = exe_path
                     return exe_path
     raise ConfigurationError(NOT_FOUND_ERRORMSG%', '.join(dirpaths))
 
@@ -6,9 +6,16 @@ File-related utilities
 import os
 from os.path import dirname, isdir, abspath, expanduser, exists, isabs, commonpath, isfile, join
 import shutil
+import sys
+import uuid
 import click
 from typing import Optional
 
+try:
+    import fcntl  # type: ignore
+except ImportError:
+    fcntl = None  # type: ignore
+
 from dataworkspaces.errors import ConfigurationError
 
 
@@ -25,6 +32,41 @@ def remove_dir_if_empty(path: str, base_dir: str, verbose: bool = False) -> None
         remove_dir_if_empty(dirname(path), base_dir, verbose)
 
 
+# ioctl request to clone a file's extents (from linux/fs.h)
+FICLONE = 0x40049409
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def copy_file(src: str, dest: str) -> None:
+    """Copy the contents of src to dest, like shutil.copyfile(). On Linux, we
+    first try to clone the file, which is a constant time copy-on-write
+    operation on filesystems like btrfs and XFS. Otherwise, we copy the data
+    within the kernel via os.sendfile(), rather than reading it into Python.
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        shutil.copyfile(src, dest)
+        return
+    if exists(dest) and os.path.samefile(src, dest):
+        raise shutil.SameFileError("%s and %s are the same file" % (src, dest))
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+            return
+        except OSError:
+            pass  # filesystem does not support cloning, or src and dest are on different ones
+        offset = 0
+        try:
+            while True:
+                sent = os.sendfile(fdest.fileno(), fsrc.fileno(), offset, SENDFILE_CHUNK_SIZE)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            if offset > 0:
+                raise
+            shutil.copyfileobj(fsrc, fdest)  # sendfile not supported for these files
+
+
 def safe_rename(src: str, dest: str) -> None:
     """Safe replacement for os.rename(). The problem is that os.rename()
     does not work across file systems. In that case, you need to actually
@@ -38,12 +80,32 @@ def safe_rename(src: str, dest: str) -> None:
                 shutil.copytree(src, dest)
                 shutil.rmtree(src)
             else:
-                shutil.copyfile(src, dest)
+                copy_file(src, dest)
                 os.remove(src)
         except Exception as e:
             raise ConfigurationError("Unable to copy %s to %s: %s" % (src, dest, e)) from e
 
 
+def write_file_atomically(path: str, data: bytes) -> None:
+    """Write data to path so that readers (or a crash) never see a partially
+    written file. We write to a temporary file in the same directory, flush it
+    to disk, and then rename it over the original. The temporary file's name
+    is unique and ends in .tmp, which the workspace's .dataworkspace/.gitignore
+    excludes, so a file left behind by a crash is never committed.
+    """
+    tmp_path = "%s.%s.tmp" % (path, uuid.uuid4().hex[:8])
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except:
+        if exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def get_subpath_from_absolute(absolute_parent_path: str, absolute_child_path: str) -> Optional[str]:
     """Given two absolute paths where one is the parent of the other, return the
     child path as a relative path from the parent. Returns None if the paths are
@@ -30,13 +30,21 @@ def has_git_fat_been_initialized(repo_dir: str) -> bool:
 GIT_FAT_ERRMSG = "Ensure that the dataworkspaces package is installed and that you have activated your virtual environment (if any)."
 
 
+# Set by the first successful validate_git_fat_in_path() call, so that we
+# only search the PATH once.
+_git_fat_found_in_path = False
+
+
 def validate_git_fat_in_path() -> None:
     """Validate that git-fat is in the path, asssuming we already know that this
     is a git-fat repo.
     If the executable is not found, throw a configuration error. We need to do this, as git itself
     will not return an error return code if a filter (e.g. git-fat) is not found.
     """
-    find_exe("git-fat", GIT_FAT_ERRMSG, additional_search_locations=[])
+    global _git_fat_found_in_path
+    if not _git_fat_found_in_path:
+        find_exe("git-fat", GIT_FAT_ERRMSG, additional_search_locations=[])
+        _git_fat_found_in_path = True
 
 
 def validate_git_fat_in_path_if_needed(repo_dir: str) -> None:
@@ -46,7 +54,7 @@ def validate_git_fat_in_path_if_needed(repo_dir: str) -> None:
     """
     if not is_a_git_fat_repo(repo_dir):
         return
-    find_exe("git-fat", GIT_FAT_ERRMSG, additional_search_locations=[])
+    validate_git_fat_in_path()
 
 
 def run_git_fat_pull_if_needed(repo_dir: str, verbose: bool) -> None:
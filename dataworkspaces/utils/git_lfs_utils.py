@@ -60,6 +60,11 @@ def is_git_lfs_installed_for_user(home_dir: str = str(Path.home())) -> bool:
 GIT_LFS_ERRMSG = "git-lfs does not seem to be installed on your system. Install it or, if it is already installed, make sure that it is in your PATH."
 
 
+# Path to git-lfs, set by the first successful find_git_lfs_in_path() call.
+# Unlike GIT_EXE_PATH, we cannot look this up at import time, as git-lfs is optional.
+_GIT_LFS_EXE_PATH = None  # type: Optional[str]
+
+
 def find_git_lfs_in_path() -> str:
     """Validate that git-lfs is in the path, asssuming we already know that this
     is a git-lfs repo.
@@ -68,7 +73,10 @@ def find_git_lfs_in_path() -> str:
 
     Retuns the path to the git-lfs executable.
     """
-    return find_exe("git-lfs", GIT_LFS_ERRMSG, additional_search_locations=[])
+    global _GIT_LFS_EXE_PATH
+    if _GIT_LFS_EXE_PATH is None:
+        _GIT_LFS_EXE_PATH = find_exe("git-lfs", GIT_LFS_ERRMSG, additional_search_locations=[])
+    return _GIT_LFS_EXE_PATH
 
 
 def ensure_git_lfs_installed_for_user(lfs_exe, verbose: bool = False) -> bool:
@@ -109,7 +117,7 @@ def ensure_git_lfs_configured_if_needed(repo_dir: str, verbose: bool = False) ->
     """
     if not is_a_git_lfs_repo(repo_dir, recursive=True):
         return
-    lfs_exe = find_exe("git-lfs", GIT_LFS_ERRMSG, additional_search_locations=[])
+    lfs_exe = find_git_lfs_in_path()
     need_to_download = ensure_git_lfs_installed_for_user(lfs_exe, verbose=verbose)
     if need_to_download:
         # If the user wasn't configured for git-lfs when cloning, we need to
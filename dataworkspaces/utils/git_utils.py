@@ -2,18 +2,20 @@
 """
 Utility functions related to interacting with git
 """
-from os.path import isdir, join, dirname, exists
-from subprocess import run, PIPE
-import shutil
-import re
+import os
+from os.path import isdir, join, dirname, exists, abspath
+from subprocess import run, Popen, PIPE
+from contextlib import contextmanager
+import mmap
+import struct
 import tempfile
-import json
-from typing import Any, List
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import click
 
 from .subprocess_utils import find_exe, call_subprocess, call_subprocess_for_rc
 from .file_utils import remove_dir_if_empty
+from .json_utils import loads as json_loads
 from dataworkspaces.errors import ConfigurationError, InternalError, UserAbort
 
 
@@ -27,13 +29,62 @@ def is_git_repo(dirpath):
 GIT_EXE_PATH = find_exe("git", "Please make sure that you have git installed on your machine.")
 
 
+# Results of read-only git queries, keyed by (query name, repo dir, ...).
+# This is only set within a cached_git_queries() block.
+_git_query_cache = None  # type: Optional[Dict[tuple, bool]]
+# Long-lived git cat-file processes, keyed by repo dir, used by
+# git_commit_exists() within a cached_git_queries() block.
+_git_object_readers = None  # type: Optional[Dict[str, GitBlobReader]]
+
+
+@contextmanager
+def cached_git_queries() -> Iterator[None]:
+    """Within this block, the results of is_git_dirty(),
+    is_pull_needed_from_remote(), and git_commit_exists() are remembered, so that asking the same
+    question about the same repo does not run git again. Commit lookups also
+    share one git cat-file process per repo. Only use this
+    around code that does not change the repos or their remotes, such as a
+    sequence of resource prechecks.
+    """
+    global _git_query_cache, _git_object_readers
+    if _git_query_cache is not None:
+        yield  # nested block, keep using the outer cache
+        return
+    _git_query_cache = {}
+    _git_object_readers = {}
+    try:
+        yield
+    finally:
+        readers = _git_object_readers
+        _git_query_cache = None
+        _git_object_readers = None
+        for reader in readers.values():
+            reader.close()
+
+
 def is_git_dirty(cwd):
     """See if the git repo is dirty. We are looking for untracked
     files, changes in staging, and changes in the working directory.
     """
+    if _git_query_cache is None:
+        return _is_git_dirty(cwd)
+    key = ("is_git_dirty", abspath(cwd))
+    if key not in _git_query_cache:
+        _git_query_cache[key] = _is_git_dirty(cwd)
+    return _git_query_cache[key]
+
+
+# Options for the git status calls used to check whether a repo is dirty. We only
+# need to know whether anything changed, so rename detection is skipped. Untracked
+# directories are reported without listing their contents, regardless of the user's
+# status.showUntrackedFiles setting.
+GIT_STATUS_DIRTY_ARGS = ["status", "--porcelain", "--no-renames", "--untracked-files=normal"]
+
+
+def _is_git_dirty(cwd):
     if GIT_EXE_PATH is None:
         raise ConfigurationError("git executable not found")
-    cmd = [GIT_EXE_PATH, "status", "--porcelain"]
+    cmd = [GIT_EXE_PATH] + GIT_STATUS_DIRTY_ARGS
     p = run(cmd, cwd=cwd, stdout=PIPE, encoding="utf-8")
     for line in p.stdout.split("\n"):
         if len(line) < 2:
@@ -50,7 +101,7 @@ def is_git_subdir_dirty(cwd, subdir):
     """See if the git repo is dirty. We are looking for untracked
     files, changes in staging, and changes in the working directory.
     """
-    cmd = [GIT_EXE_PATH, "status", "--porcelain", subdir]
+    cmd = [GIT_EXE_PATH] + GIT_STATUS_DIRTY_ARGS + [subdir]
     p = run(cmd, cwd=cwd, stdout=PIPE, encoding="utf-8")
     for line in p.stdout.split("\n"):
         if len(line) < 2:
@@ -69,7 +120,8 @@ def is_git_staging_dirty(cwd, subdir=None):
     """See if the git repo as uncommited changes in staging. If the
     subdirectory is specified, then we only look within that subdirectory
     """
-    cmd = [GIT_EXE_PATH, "status", "--porcelain"]
+    # untracked files are never staged, so there is no need to look for them
+    cmd = [GIT_EXE_PATH, "status", "--porcelain", "--no-renames", "--untracked-files=no"]
     if subdir is not None:
         cmd.append(subdir)
     p = run(cmd, cwd=cwd, stdout=PIPE, encoding="utf-8")
@@ -102,13 +154,103 @@ def is_pull_needed_from_remote(cwd: str, branch: str, verbose: bool) -> bool:
     """Do check whether we need a pull, we get the hash of the HEAD
     of the remote's master branch. Then, we see if we have this object locally.
     """
+    if _git_query_cache is None:
+        return _is_pull_needed_from_remote(cwd, branch, verbose)
+    key = ("is_pull_needed_from_remote", abspath(cwd), branch)
+    if key not in _git_query_cache:
+        _git_query_cache[key] = _is_pull_needed_from_remote(cwd, branch, verbose)
+    return _git_query_cache[key]
+
+
+def _is_pull_needed_from_remote(cwd: str, branch: str, verbose: bool) -> bool:
     hashval = get_remote_head_hash(cwd, branch, verbose)
     if hashval is None:
         return False
-    # cmd = [GIT_EXE_PATH, 'show', '--oneline', hashval]
-    cmd = [GIT_EXE_PATH, "cat-file", "-e", hashval + "^{commit}"]
-    rc = call_subprocess_for_rc(cmd, cwd, verbose=verbose)
-    return rc != 0
+    return not git_commit_exists(cwd, hashval, verbose)
+
+
+PACK_INDEX_V2_HEADER = b"\377tOc\0\0\0\2"
+
+
+def _pack_index_contains(idx_path: str, binsha: bytes) -> bool:
+    """Binary search a version 2 pack index file for the object name binsha,
+    using the fanout table to narrow the range.
+    """
+    try:
+        with open(idx_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+                if idx[:8] != PACK_INDEX_V2_HEADER:
+                    return False
+                fanout = 8
+                names = fanout + 256 * 4
+                first = binsha[0]
+                lo = 0 if first == 0 else struct.unpack_from(">I", idx, fanout + 4 * (first - 1))[0]
+                hi = struct.unpack_from(">I", idx, fanout + 4 * first)[0]
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    name = idx[names + 20 * mid : names + 20 * (mid + 1)]
+                    if name == binsha:
+                        return True
+                    elif name < binsha:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+    except (OSError, ValueError, struct.error):
+        pass
+    return False
+
+
+def _object_in_local_store(repo_dir: str, hashval: str) -> bool:
+    """Look for the object named by the full SHA-1 hashval directly in the
+    repo's object store, without running git: first as a loose object, then
+    in the pack indexes. A False result is not definitive (the object may be
+    in an alternate object store, or repo_dir may not be the root of the repo),
+    so the caller should fall back to asking git.
+    """
+    if len(hashval) != 40:
+        return False
+    try:
+        binsha = bytes.fromhex(hashval)
+    except ValueError:
+        return False
+    hashval = hashval.lower()
+    objects_dir = join(repo_dir, ".git", "objects")
+    if exists(join(objects_dir, hashval[:2], hashval[2:])):
+        return True
+    pack_dir = join(objects_dir, "pack")
+    if not isdir(pack_dir):
+        return False
+    return any(
+        _pack_index_contains(join(pack_dir, fname), binsha)
+        for fname in os.listdir(pack_dir)
+        if fname.endswith(".idx")
+    )
+
+
+def git_commit_exists(repo_dir: str, hashval: str, verbose: bool = False) -> bool:
+    """Return True if the specified commit is present in the local repository.
+    Within a cached_git_queries() block, the answer is remembered.
+
+    We first look for the object in the local object store ourselves, which
+    avoids starting git in the common case. The hashes we check come from
+    branch heads and snapshots, so an object found there will be a commit.
+    """
+    key = ("git_commit_exists", abspath(repo_dir), hashval)
+    if _git_query_cache is not None and key in _git_query_cache:
+        return _git_query_cache[key]
+    if _object_in_local_store(repo_dir, hashval):
+        found = True
+    elif _git_object_readers is not None:
+        reader = _git_object_readers.get(key[1])
+        if reader is None:
+            reader = _git_object_readers[key[1]] = GitBlobReader(repo_dir)
+        found = reader.has_commit(hashval)
+    else:
+        cmd = [GIT_EXE_PATH, "cat-file", "-e", hashval + "^{commit}"]
+        found = call_subprocess_for_rc(cmd, repo_dir, verbose=verbose) == 0
+    if _git_query_cache is not None:
+        _git_query_cache[key] = found
+    return found
 
 
 def git_init(repo_dir, verbose=False):
@@ -119,31 +261,155 @@ def git_add(repo_dir: str, relative_paths: List[str], verbose: bool = False) ->
     call_subprocess([GIT_EXE_PATH, "add"] + relative_paths, cwd=repo_dir, verbose=verbose)
 
 
+# The version of git found at GIT_EXE_PATH, as a tuple of integers. This is
+# looked up on first use by get_git_version().
+_git_version = None  # type: Optional[Tuple[int, ...]]
+
+
+def get_git_version() -> Tuple[int, ...]:
+    """Return the version of the git executable as a tuple of integers,
+    e.g. (2, 25, 1). Vendor suffixes like ".windows.1" are ignored.
+    """
+    global _git_version
+    if _git_version is None:
+        # The output looks like "git version 2.25.1" or "git version 2.39.5.windows.1"
+        out = call_subprocess([GIT_EXE_PATH, "--version"], cwd=os.curdir)
+        fields = out.split()
+        components = fields[2].split(".") if len(fields) > 2 else []
+        version = []  # type: List[int]
+        for component in components:
+            if not component.isdigit():
+                break
+            version.append(int(component))
+        _git_version = tuple(version)
+    return _git_version
+
+
+# git add --pathspec-from-file was added in git 2.25
+PATHSPEC_FROM_FILE_GIT_VERSION = (2, 25)
+
+# When passing paths as arguments, keep each command line under this many
+# characters. Windows limits the command line to 32767 characters.
+MAX_PATHS_ARG_CHARS = 30000
+
+
+def git_add_all(repo_dir: str, relative_paths: List[str], verbose: bool = False) -> None:
+    """Stage the current state of the specified paths, including any deletions.
+    If git supports it, we use a single git process, passing the paths via
+    standard input, so there is no limit on the number of paths. Older
+    versions of git get the paths as arguments, split over as many
+    git add calls as needed to keep each command line short enough.
+    """
+    if len(relative_paths) == 0:
+        return
+    if get_git_version() < PATHSPEC_FROM_FILE_GIT_VERSION:
+        base_cmd = [GIT_EXE_PATH, "--literal-pathspecs", "add", "-A", "--"]
+        chunk = []  # type: List[str]
+        chunk_chars = 0
+        for path in relative_paths:
+            if len(chunk) > 0 and chunk_chars + len(path) + 1 > MAX_PATHS_ARG_CHARS:
+                call_subprocess(base_cmd + chunk, cwd=repo_dir, verbose=verbose)
+                chunk = []
+                chunk_chars = 0
+            chunk.append(path)
+            chunk_chars += len(path) + 1
+        call_subprocess(base_cmd + chunk, cwd=repo_dir, verbose=verbose)
+        return
+    cmd = [
+        GIT_EXE_PATH,
+        "--literal-pathspecs",
+        "add",
+        "-A",
+        "--pathspec-from-file=-",
+        "--pathspec-file-nul",
+    ]
+    if verbose:
+        click.echo("%s [run in %s]" % (" ".join(cmd), repo_dir))
+    cp = run(
+        cmd,
+        cwd=repo_dir,
+        input="\0".join(relative_paths),
+        encoding="utf-8",
+        stdout=PIPE,
+        stderr=PIPE,
+    )
+    if cp.returncode != 0:
+        click.echo(cp.stderr)
+    cp.check_returncode()
+
+
+def get_files_tracked_by_git(cwd: str, verbose: bool = False) -> Set[str]:
+    """Return the set of files under cwd that are tracked by git, as
+    paths relative to cwd.
+    """
+    data = call_subprocess([GIT_EXE_PATH, "ls-files", "-z"], cwd=cwd, verbose=verbose)
+    return set(path for path in data.split("\0") if len(path) > 0)
+
+
 def git_commit(repo_dir: str, message: str, verbose: bool = False) -> None:
     """Unconditional git commit
     """
     call_subprocess([GIT_EXE_PATH, "commit", "-m", message], cwd=repo_dir, verbose=verbose)
 
 
+def get_local_branches(local_path: str, verbose: bool = False) -> List[str]:
+    """Return the names of all the local branches in the repo.
+    """
+    data = call_subprocess(
+        [GIT_EXE_PATH, "for-each-ref", "--format=%(refname)", "refs/heads/"],
+        cwd=local_path,
+        verbose=verbose,
+    )
+    prefix_len = len("refs/heads/")
+    return [line[prefix_len:] for line in data.split("\n") if line.startswith("refs/heads/")]
+
+
 def get_branch_info(local_path, verbose=False):
-    data = call_subprocess([GIT_EXE_PATH, "branch"], cwd=local_path, verbose=verbose)
-    current = None
-    other = []
-    for line in data.split("\n"):
-        line = line.strip()
-        if len(line) == 0:
-            continue
-        if line.startswith("*"):
-            assert current is None
-            current = line[2:]
-        else:
-            other.append(line)
+    """Return a tuple of the current branch and a list of the other local branches.
+    """
+    current = get_current_branch(local_path, verbose)
     if current is None:
         raise InternalError(
             "Problem obtaining branch information for local git repo at %s" % local_path
         )
-    else:
-        return (current, other)
+    other = [branch for branch in get_local_branches(local_path, verbose) if branch != current]
+    return (current, other)
+
+
+# Current branch of each repo, as last returned by get_current_branch(), keyed
+# by repo dir. Each entry also records the inode and modification time of
+# .git/HEAD. Git replaces that file whenever the branch changes, so a matching
+# stat means the cached branch is still current.
+_current_branch_cache = {}  # type: Dict[str, Tuple[Tuple[int, int], Optional[str]]]
+
+
+def _get_head_file_stat(local_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(join(local_path, ".git", "HEAD"))
+    except OSError:
+        return None  # not the root of a repo with a .git directory
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def get_current_branch(local_path: str, verbose: bool = False) -> Optional[str]:
+    """Return the name of the currently checked out branch, or None if HEAD is
+    detached. Unlike get_branch_info(), this does not need to list all the
+    branches - git just reads .git/HEAD. If HEAD has not changed since our
+    last call for this repo, we do not need to run git at all.
+    """
+    key = abspath(local_path)
+    head_stat = _get_head_file_stat(local_path)
+    cached = _current_branch_cache.get(key)
+    if head_stat is not None and cached is not None and cached[0] == head_stat:
+        return cached[1]
+    cmd = [GIT_EXE_PATH, "symbolic-ref", "--short", "-q", "HEAD"]
+    if verbose:
+        click.echo("%s [run in %s]" % (" ".join(cmd), local_path))
+    cp = run(cmd, cwd=local_path, encoding="utf-8", stdout=PIPE, stderr=PIPE)
+    branch = cp.stdout.strip() if cp.returncode == 0 else None
+    if head_stat is not None:
+        _current_branch_cache[key] = (head_stat, branch)
+    return branch
 
 
 def switch_git_branch(local_path, branch, verbose):
@@ -156,15 +422,15 @@ def switch_git_branch(local_path, branch, verbose):
 
 
 def switch_git_branch_if_needed(local_path, branch, verbose, ok_if_not_present=False):
-    (current, others) = get_branch_info(local_path, verbose)
-    if branch == current:
+    if branch == get_current_branch(local_path, verbose):
         return
-    else:
-        if (branch not in others) and (not ok_if_not_present):
+    if not ok_if_not_present:
+        branches = get_local_branches(local_path, verbose)
+        if branch not in branches:
             raise InternalError(
-                "Trying to switch to branch %s not in repo at %s" % (branch, others)
+                "Trying to switch to branch %s not in repo at %s" % (branch, branches)
             )
-        switch_git_branch(local_path, branch, verbose)
+    switch_git_branch(local_path, branch, verbose)
 
 
 def git_remove_subtree(
@@ -257,28 +523,27 @@ def commit_changes_in_repo(local_path, message, remove_empty_dirs=False, verbose
     )
     maybe_delete_dirs = []
     need_to_commit = False
+    add_paths = []  # staged together at the end, including deletions
     for line in status.split("\n"):
         if len(line) < 2:
             continue
         relpath = line[2:].strip()
         if relpath[0]=='"' and relpath[-1]=='"':
             relpath = relpath[1:-1] # line has spaces, so git enclosed it in quotes
-        if line[1] == "?":
-            call_subprocess([GIT_EXE_PATH, "add", relpath], cwd=local_path, verbose=verbose)
+        if line[1] in ("?", "M"):
+            add_paths.append(relpath)
             need_to_commit = True
         elif line[1] == "D":
-            call_subprocess([GIT_EXE_PATH, "rm", relpath], cwd=local_path, verbose=verbose)
+            add_paths.append(relpath)
             maybe_delete_dirs.append(dirname(join(local_path, relpath)))
             need_to_commit = True
-        elif line[1] == "M":
-            call_subprocess([GIT_EXE_PATH, "add", relpath], cwd=local_path, verbose=verbose)
-            need_to_commit = True
         elif line[0] in ("?", "A", "D", "M"):
             need_to_commit = True
             if line[0] == "D":
                 maybe_delete_dirs.append(dirname(join(local_path, relpath)))
         elif verbose:
             click.echo("Skipping git status line: '%s'" % line)
+    git_add_all(local_path, add_paths, verbose)
     if remove_empty_dirs:
         for d in maybe_delete_dirs:
             remove_dir_if_empty(d, local_path, verbose=verbose)
@@ -294,25 +559,28 @@ def checkout_and_apply_commit(local_path, commit_hash, verbose=False):
         local_path, "Commit state of repo prior to restore of %s" % commit_hash, verbose=verbose
     )
     # make sure there are actually differences between the commits
-    if (
-        call_subprocess_for_rc(
-            [GIT_EXE_PATH, "diff", "--exit-code", "--quiet", "HEAD", commit_hash],
-            cwd=local_path,
-            verbose=verbose,
-        )
-        == 0
-    ):
+    changes = call_subprocess(
+        [GIT_EXE_PATH, "diff", "--name-status", "--no-renames", "-z", "HEAD", commit_hash],
+        cwd=local_path,
+        verbose=verbose,
+    ).split("\0")
+    if len(changes) < 2:
         if verbose:
             click.echo("No changes for %s between HEAD and %s" % (local_path, commit_hash))
         return
-    # ok, there are, apply the changes
-    cmdstr = "%s diff HEAD %s | %s apply" % (GIT_EXE_PATH, commit_hash, GIT_EXE_PATH)
-    if verbose:
-        click.echo(cmdstr + "[run in %s]" % local_path)
-    cp = run(cmdstr, cwd=local_path, shell=True)
-    cp.check_returncode()
-    commit_changes_in_repo(
-        local_path, "Revert to commit %s" % commit_hash, remove_empty_dirs=True, verbose=verbose
+    # ok, there are. Set the index and working tree to the commit's tree
+    # (keeping the history of HEAD) and commit the result.
+    call_subprocess(
+        [GIT_EXE_PATH, "read-tree", "-u", "--reset", commit_hash], cwd=local_path, verbose=verbose
+    )
+    # the output alternates between status letters and paths
+    for (status, relpath) in zip(changes[0::2], changes[1::2]):
+        if status == "D":
+            remove_dir_if_empty(dirname(join(local_path, relpath)), local_path, verbose=verbose)
+    call_subprocess(
+        [GIT_EXE_PATH, "commit", "-m", "Revert to commit %s" % commit_hash],
+        cwd=local_path,
+        verbose=verbose,
     )
 
 
@@ -323,13 +591,28 @@ def commit_changes_in_repo_subdir(
     the working tree relative to HEAD and get those changes into HEAD. We
     only commit if there is something to be done.
     """
-    if not subdir.endswith("/"):
-        subdir = subdir + "/"
+    commit_changes_in_repo_subdirs(
+        local_path, [subdir], message, remove_empty_dirs=remove_empty_dirs, verbose=verbose
+    )
+
+
+def commit_changes_in_repo_subdirs(
+    local_path: str,
+    subdirs: List[str],
+    message: str,
+    remove_empty_dirs: bool = False,
+    verbose: bool = False,
+) -> None:
+    """Like commit_changes_in_repo_subdir(), but for several subdirectories
+    at once, using one git status, one add and one commit for all of them.
+    """
+    subdirs = [subdir if subdir.endswith("/") else subdir + "/" for subdir in subdirs]
     status = call_subprocess(
-        [GIT_EXE_PATH, "status", "--porcelain", subdir], cwd=local_path, verbose=verbose
+        [GIT_EXE_PATH, "status", "--porcelain", "--"] + subdirs, cwd=local_path, verbose=verbose
     )
-    maybe_delete_dirs = []
+    maybe_delete_dirs = []  # list of (directory, its subdir)
     need_to_commit = False
+    add_paths = []  # staged together at the end, including deletions
     for line in status.split("\n"):
         if len(line) < 2:
             continue
@@ -338,30 +621,31 @@ def commit_changes_in_repo_subdir(
         relpath = line[2:].strip()
         if relpath[0]=='"' and relpath[-1]=='"': # issue 79
             relpath = relpath[1:-1] # line has spaces, so git enclosed it in quotes
-        if not relpath.startswith(subdir):
-            raise InternalError("Git status line not in subdirectory %s: %s" % (subdir, line))
-        elif line[1] == "?":
-            call_subprocess([GIT_EXE_PATH, "add", relpath], cwd=local_path, verbose=verbose)
+        subdir = next((subdir for subdir in subdirs if relpath.startswith(subdir)), None)
+        if subdir is None:
+            raise InternalError(
+                "Git status line not in subdirectories %s: %s" % (", ".join(subdirs), line)
+            )
+        elif line[1] in ("?", "M"):
+            add_paths.append(relpath)
             need_to_commit = True
         elif line[1] == "D":
-            call_subprocess([GIT_EXE_PATH, "rm", relpath], cwd=local_path, verbose=verbose)
-            maybe_delete_dirs.append(dirname(join(local_path, relpath)))
-            need_to_commit = True
-        elif line[1] == "M":
-            call_subprocess([GIT_EXE_PATH, "add", relpath], cwd=local_path, verbose=verbose)
+            add_paths.append(relpath)
+            maybe_delete_dirs.append((dirname(join(local_path, relpath)), subdir))
             need_to_commit = True
         elif line[0] in ("?", "A", "D", "M"):
             need_to_commit = True
             if line[0] == "D":
-                maybe_delete_dirs.append(dirname(join(local_path, relpath)))
+                maybe_delete_dirs.append((dirname(join(local_path, relpath)), subdir))
         elif verbose:
             click.echo("Skipping git status line: '%s'" % line)
+    git_add_all(local_path, add_paths, verbose)
     if remove_empty_dirs:
-        for d in maybe_delete_dirs:
+        for (d, subdir) in maybe_delete_dirs:
             remove_dir_if_empty(d, join(local_path, subdir), verbose=verbose)
     if need_to_commit:
         call_subprocess(
-            [GIT_EXE_PATH, "commit", "--only", subdir, "-m", message],
+            [GIT_EXE_PATH, "commit", "--only", "-m", message, "--"] + subdirs,
             cwd=local_path,
             verbose=verbose,
         )
@@ -417,6 +701,21 @@ def get_local_head_hash(git_root, verbose=False):
     return hashval.strip()
 
 
+def get_local_head_hash_and_branch(
+    git_root: str, verbose: bool = False
+) -> Tuple[str, Optional[str]]:
+    """Return the hash of HEAD and the name of the current branch (None if HEAD
+    is detached), using a single git rev-parse call.
+    """
+    data = call_subprocess(
+        [GIT_EXE_PATH, "rev-parse", "HEAD", "--abbrev-ref", "HEAD"], cwd=git_root, verbose=verbose
+    )
+    lines = data.split()
+    if len(lines) != 2:
+        raise InternalError("Unexpected output from git rev-parse in %s: %s" % (git_root, data))
+    return (lines[0], lines[1] if lines[1] != "HEAD" else None)
+
+
 def get_remote_head_hash(cwd, branch, verbose):
     cmd = [GIT_EXE_PATH, "ls-remote", "origin", "-h", "refs/heads/" + branch]
     try:
@@ -432,29 +731,40 @@ def get_remote_head_hash(cwd, branch, verbose):
         ) from e
 
 
-LS_TREE_RE = re.compile(r"^\d+\s+tree\s([0-9a-f]{40})\s+(\w+.*)$")
+def get_local_head_and_subdirectory_hash(
+    repo_dir: str, relpath: str, verbose: bool = False
+) -> Tuple[str, str]:
+    """Return the hash of HEAD and the hash of the specified subdirectory in the
+    HEAD revision, using a single git cat-file call. The subdirectory hash
+    matches the hash that git is storing internally. You should be able to run:
+    git cat-file -p HASH to see a listing of the contents.
+    """
+    cmd = [GIT_EXE_PATH, "cat-file", "--batch-check"]
+    if verbose:
+        click.echo("%s [run in %s]" % (" ".join(cmd), repo_dir))
+    cp = run(
+        cmd,
+        cwd=repo_dir,
+        input="HEAD\nHEAD:%s\n" % relpath,
+        encoding="utf-8",
+        stdout=PIPE,
+        stderr=PIPE,
+    )
+    cp.check_returncode()
+    # Each output line is "<hash> <type> <size>", or "<request> missing"
+    lines = [line.split(" ") for line in cp.stdout.splitlines()]
+    if len(lines) != 2 or lines[0][1:2] != ["commit"]:
+        raise InternalError("Unexpected output from git cat-file in %s: %s" % (repo_dir, cp.stdout))
+    if lines[1][1:2] != ["tree"]:
+        raise InternalError("Did not find subdirectory '%s' in git cat-file" % relpath)
+    return (lines[0][0], lines[1][0])
 
 
 def get_subdirectory_hash(repo_dir, relpath, verbose=False):
     """Get the subdirectory hash for the HEAD revision of the
-    specified path. This matches the hash that git is storing
-    internally. You should be able to run: git cat-file -p HASH
-    to see a listing of the contents.
+    specified path. See get_local_head_and_subdirectory_hash().
     """
-    cmd = [GIT_EXE_PATH, "ls-tree", "-t", "HEAD", relpath]
-    if verbose:
-        click.echo("%s [run in %s]" % (" ".join(cmd), repo_dir))
-    cp = run(cmd, cwd=repo_dir, encoding="utf-8", stdout=PIPE, stderr=PIPE)
-    cp.check_returncode()
-    for line in cp.stdout.split("\n"):
-        m = LS_TREE_RE.match(line)
-        if m is None:
-            continue
-        hashval = m.group(1)
-        subdir = m.group(2)
-        if subdir == relpath:
-            return hashval
-    raise InternalError("Did not find subdirectory '%s' in git ls-tree" % relpath)
+    return get_local_head_and_subdirectory_hash(repo_dir, relpath, verbose=verbose)[1]
 
 
 def get_remote_origin_url(repo_dir: str, verbose: bool) -> str:
@@ -470,24 +780,88 @@ def get_remote_origin_url(repo_dir: str, verbose: bool) -> str:
         ) from e
 
 
+class GitBlobReader:
+    """Read files at specific commits from a local repository, using a single
+    long-lived git cat-file --batch process for all the reads. Use this
+    as a context manager, so that the process is shut down at the end.
+    """
+
+    def __init__(self, repo_dir: str):
+        self.repo_dir = repo_dir
+        self.proc = Popen(
+            [GIT_EXE_PATH, "cat-file", "--batch"], cwd=repo_dir, stdin=PIPE, stdout=PIPE
+        )
+
+    def _request(self, obj: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """Ask for the object named by obj, returning its type and contents,
+        or (None, None) if it is not available locally.
+        """
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        self.proc.stdin.write((obj + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().decode("utf-8")
+        if header == "":
+            raise InternalError("git cat-file exited unexpectedly in %s" % self.repo_dir)
+        # The header is "<hash> <type> <size>", or "<request> missing" if not found
+        fields = header.rstrip("\n").split(" ")
+        if len(fields) != 3 or not fields[2].isdigit():
+            return (None, None)
+        contents = self.proc.stdout.read(int(fields[2]))
+        self.proc.stdout.read(1)  # trailing newline
+        return (fields[1], contents)
+
+    def read(self, commit: str, relpath: str) -> Optional[bytes]:
+        """Return the contents of relpath at the specified commit, or None if the
+        commit or file is not available locally. Objects fetched since the
+        reader was started are also found.
+        """
+        (obj_type, contents) = self._request("%s:%s" % (commit, relpath))
+        return contents if obj_type == "blob" else None
+
+    def has_commit(self, hashval: str) -> bool:
+        """Return True if the specified commit is available locally.
+        """
+        (obj_type, _) = self._request(hashval + "^{commit}")
+        return obj_type == "commit"
+
+    def close(self) -> None:
+        if self.proc.stdin is not None:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+    def __enter__(self) -> "GitBlobReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
 def get_json_file_from_remote(relpath: str, repo_dir: str, verbose: bool) -> Any:
     """Download a JSON file from the remote master, parse it,
     and return it.
+
+    We make a shallow, bare clone of the remote into a temporary directory
+    and read the file out of it with git cat-file, so nothing is checked
+    out and the objects never enter the local repository. Fetching into
+    the local repository would make is_pull_needed_from_remote() think the
+    remote's HEAD had already been pulled.
     """
     remote_url = get_remote_origin_url(repo_dir, verbose)
-    tdir = None
     try:
         with tempfile.TemporaryDirectory() as tdir:
             # Issue #30 - we wanted to use the git-archive command,
             # but it is not supported by GitHub.
             call_subprocess(
-                [GIT_EXE_PATH, "clone", "--depth=1", remote_url, "root"], cwd=tdir, verbose=verbose
+                [GIT_EXE_PATH, "clone", "--quiet", "--bare", "--depth=1", remote_url, "root"],
+                cwd=tdir,
+                verbose=verbose,
             )
-            with open(join(join(tdir, "root"), relpath), "r") as f:
-                return json.load(f)
+            with GitBlobReader(join(tdir, "root")) as reader:
+                contents = reader.read("HEAD", relpath)
+        if contents is None:
+            raise ConfigurationError("File %s not found in remote HEAD" % relpath)
+        return json_loads(contents)
     except Exception as e:
-        if (tdir is not None) and isdir(tdir):
-            shutil.rmtree(tdir)
         raise ConfigurationError("Problem retrieving file %s from remote" % relpath) from e
 
 
@@ -502,6 +876,18 @@ def get_git_config_param(repo_dir, param_name, verbose):
     return param_val.strip()
 
 
+def strip_gitignore_slashes(entry: str) -> str:
+    """Remove a single leading and/or trailing slash from a .gitignore entry.
+    This is used to compare entries that match the same path but differ in
+    whether they are anchored at the repo root or only match directories.
+    """
+    if entry.startswith("/"):
+        entry = entry[1:]
+    if entry.endswith("/"):
+        entry = entry[:-1]
+    return entry
+
+
 def ensure_entry_in_gitignore(
     repo_dir: str,
     gitignore_rel_path: str,
@@ -523,20 +909,11 @@ def ensure_entry_in_gitignore(
 
     Returns True if a change was made, False otherwise.
     """
-
-    def strip_slashes(e):
-        if len(e) == 0:
-            return ""
-        if e.startswith("/"):
-            e = e[1:]
-        if e.endswith("/"):
-            e = e[:-1]
-        assert len(e) > 0
-        return e
-
-    entry_wo_slashes = strip_slashes(entry)
+    entry_wo_slashes = strip_gitignore_slashes(entry)
+    assert len(entry_wo_slashes) > 0
     abs_file_path = join(repo_dir, gitignore_rel_path)
-    if exists(abs_file_path):
+    file_existed = exists(abs_file_path)
+    if file_existed:
         last_has_newline = True
         with open(abs_file_path, "r") as f:
             for line in f:
@@ -546,7 +923,7 @@ def ensure_entry_in_gitignore(
                     last_has_newline = False
                 line = line.rstrip()
                 if line == entry or (
-                    match_independent_of_slashes and strip_slashes(line) == entry_wo_slashes
+                    match_independent_of_slashes and strip_gitignore_slashes(line) == entry_wo_slashes
                 ):
                     return False  # entry already present, nothing to do
         with open(abs_file_path, "a") as f:
@@ -556,13 +933,21 @@ def ensure_entry_in_gitignore(
     else:
         with open(abs_file_path, "a") as f:
             f.write(entry + "\n")
-    call_subprocess([GIT_EXE_PATH, "add", gitignore_rel_path], cwd=repo_dir, verbose=verbose)
-    if commit:
-        call_subprocess(
-            [GIT_EXE_PATH, "commit", "-m", "Add .gitignore entry for %s" % entry],
+    message = "Add .gitignore entry for %s" % entry
+    if commit and file_existed:
+        # If the file is already tracked, git commit can stage it for us,
+        # saving the separate git add. This fails for an untracked file,
+        # in which case we fall back to add and commit.
+        rc = call_subprocess_for_rc(
+            [GIT_EXE_PATH, "commit", "-m", message, "--", gitignore_rel_path],
             cwd=repo_dir,
             verbose=verbose,
         )
+        if rc == 0:
+            return True
+    call_subprocess([GIT_EXE_PATH, "add", gitignore_rel_path], cwd=repo_dir, verbose=verbose)
+    if commit:
+        call_subprocess([GIT_EXE_PATH, "commit", "-m", message], cwd=repo_dir, verbose=verbose)
     return True
 
 
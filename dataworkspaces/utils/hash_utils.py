@@ -6,23 +6,25 @@ without necessarily requiring git to be installed.
 import hashlib
 import re
 
-HASH_RE = re.compile(r"^[0-9a-fA-F]+$")
+# The length checks are part of the patterns, and we use fullmatch(),
+# so each check is a single regular expression match.
+HASH_RE = re.compile(r"[0-9a-fA-F]{40}")
 
 
 def is_a_git_hash(s):
-    return len(s) == 40 and (HASH_RE.match(s) is not None)
+    return HASH_RE.fullmatch(s) is not None
 
 
 MIN_SHORT_HASH_LEN = 6
 # short hashes must be lowercase
-SHORT_HASH_RE = re.compile(r"^[0-9a-f]+$")
+SHORT_HASH_RE = re.compile(r"[0-9a-f]{%d,}" % MIN_SHORT_HASH_LEN)
 
 
 def is_a_shortened_git_hash(s):
     """We can refer to snapshots using the first 6+ characters
     of the hash
     """
-    return len(s) >= MIN_SHORT_HASH_LEN and (SHORT_HASH_RE.match(s) is not None)
+    return SHORT_HASH_RE.fullmatch(s) is not None
 
 
 def hash_file(fpath):
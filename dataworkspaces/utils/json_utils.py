@@ -0,0 +1,64 @@
+"""
+Utilities for reading and writing the JSON metadata files used by workspaces
+and resources. If the optional orjson package is installed, we use it, as
+it is much faster than the standard library's json module.
+"""
+
+import json
+import math
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document given as bytes or a string. orjson is stricter
+    than the json module (e.g. it rejects the NaN values that json.dump() writes),
+    so we fall back to the json module for anything orjson cannot parse.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def load_json_file(path: str) -> Any:
+    """Read and parse the JSON file at path. The file is read as bytes
+    in a single call, avoiding a separate text decoding pass.
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    elif isinstance(obj, dict):
+        return any(_has_non_finite_float(v) for v in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        return any(_has_non_finite_float(v) for v in obj)
+    else:
+        return False
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj as JSON indented by two spaces, returning the UTF-8 bytes,
+    so that the caller can write the file with a single call.
+
+    We only use orjson's output when it matches what json.dumps() would
+    write: orjson writes NaN and infinite floats (e.g. in metrics) as null and
+    does not escape non-ASCII characters.
+    """
+    if orjson is not None and not _has_non_finite_float(obj):
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+            if data.isascii():
+                return data
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers larger than 64 bits
+    return json.dumps(obj, indent=2).encode("utf-8")
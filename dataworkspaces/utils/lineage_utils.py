@@ -38,6 +38,7 @@ from string import Template
 from dataworkspaces.errors import InternalError, LineageError
 from .regexp_utils import isots_to_dt
 from .hash_utils import is_a_git_hash
+from .json_utils import load_json_file
 
 
 class LineageConsistencyError(LineageError):
@@ -1370,8 +1371,7 @@ class FileLineageStore(LineageStore):
             return self.resource_cache[resource_name]
 
         rfile_path = join(self.current_lineage_path, resource_name + ".json")
-        with open(rfile_path, "r") as f:
-            data = json.load(f)
+        data = load_json_file(rfile_path)
         assert isinstance(data, dict), (
             "Resource lineage file %s is not in correct format" % rfile_path
         )
@@ -1442,8 +1442,7 @@ class FileLineageStore(LineageStore):
         """Since this is for a snapshot, it does not use the cache.
         """
         rfile_path = self._get_snapshot_path(resource_name, snapshot_hash)
-        with open(rfile_path, "r") as f:
-            data = json.load(f)
+        data = load_json_file(rfile_path)
         assert isinstance(data, dict), "Lineage file %s is not in expected format" % rfile_path
         # For backward compatibility, the resource file is a list of lineages rather than a map from
         # refs to lineages. We need to recreate the map.
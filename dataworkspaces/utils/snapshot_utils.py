@@ -9,13 +9,12 @@ from os.path import join, exists
 import re
 import stat
 from tempfile import NamedTemporaryFile
-import shutil
 from typing import Set, List, Pattern, Union, Callable
 
 import click
 
 from dataworkspaces.errors import ConfigurationError
-from dataworkspaces.utils.file_utils import remove_dir_if_empty
+from dataworkspaces.utils.file_utils import remove_dir_if_empty, copy_file
 from dataworkspaces.utils.hash_utils import hash_file
 
 # Timestamps have the form '2018-09-30T14:09:05'
@@ -127,7 +126,7 @@ def move_file_and_set_readonly(src: str, dest: str) -> None:
 
 
 def copy_file_and_set_readonly(src: str, dest: str) -> None:
-    shutil.copyfile(src, dest)
+    copy_file(src, dest)
     mode = os.stat(dest).st_mode
     os.chmod(dest, mode & ~stat.S_IWUSR & ~stat.S_IWGRP & ~stat.S_IWOTH)
 
@@ -162,32 +161,30 @@ def move_current_files_local_fs(
     dirs_to_remove_if_empty = []  # type: List[str]
     exclude_dirs_re_list = (
         exclude_dirs_res if isinstance(exclude_dirs_res, list) else [exclude_dirs_res,]
-    )  # type: List[Pattern]
-    exclude_dirs_re_list.append(DOT_GIT_RE)
+    ) + [DOT_GIT_RE]  # type: List[Pattern]
     for (dirpath, dirnames, filenames) in os.walk(base_dir):
         assert dirpath.startswith(base_dir)
         rel_dirpath = dirpath[len(base_dir) + 1 :]
 
-        def join_to_rel_dirpath(f):
-            return join(rel_dirpath, f)
+        def join_rel_path(name):
+            return join(rel_dirpath, name) if len(rel_dirpath) > 0 else name
 
-        join_rel_path = join_to_rel_dirpath if len(rel_dirpath) > 0 else lambda f: f
         # find directories we should skip, as they represent results from
         # prior runs
-        skip = []
-        for (i, dir_name) in enumerate(dirnames):
-            abs_dirpath = join(dirpath, dir_name)
-            rel_dirpath = abs_dirpath[len(base_dir) + 1 :]
-            for exclude_dirs_re in exclude_dirs_re_list:
-                if exclude_dirs_re.match(rel_dirpath):
-                    skip.append(i)
-                    if verbose:
-                        print("Skipping directory %s" % rel_dirpath)
-        skip.reverse()
-        for i in skip:
-            del dirnames[i]
+        kept_dirnames = []
+        for dir_name in dirnames:
+            rel_subdirpath = join_rel_path(dir_name)
+            if any(r.match(rel_subdirpath) for r in exclude_dirs_re_list):
+                if verbose:
+                    print("Skipping directory %s" % rel_subdirpath)
+            else:
+                kept_dirnames.append(dir_name)
+        dirnames[:] = kept_dirnames
         # move files to our new directory
         moved_files_out_of_this_dir = False
+        # all the files in this directory go to the same destination directory,
+        # which we check for (and create) when we reach the first one
+        dest_parent_ready = False
         for f in filenames:
             rel_src_file = join_rel_path(f)
             if rel_src_file in exclude_files:
@@ -197,19 +194,21 @@ def move_current_files_local_fs(
             assert not rel_src_file.startswith("snapshot/"), (
                 "Internal error: file %s should have been excluded from move" % rel_src_file
             )
-            rel_dest_file = join(rel_dest_root, join_rel_path(f))
+            rel_dest_file = join(rel_dest_root, rel_src_file)
             abs_src_file = join(dirpath, f)
-            abs_dest_file = join(abs_dest_root, join_rel_path(f))
+            abs_dest_file = join(abs_dest_root, rel_src_file)
             if verbose:
                 click.echo("[%s] Moving %s to %s" % (resource_name, rel_src_file, rel_dest_file))
                 click.echo("     Absolute %s => %s" % (abs_src_file, abs_dest_file))
-            dest_parent = os.path.dirname(abs_dest_file)
-            if not created_dir:
-                # lazily create the root directory
-                os.makedirs(abs_dest_root)
-                created_dir = True
-            if not exists(dest_parent):
-                os.makedirs(dest_parent)
+            if not dest_parent_ready:
+                if not created_dir:
+                    # lazily create the root directory
+                    os.makedirs(abs_dest_root)
+                    created_dir = True
+                dest_parent = os.path.dirname(abs_dest_file)
+                if not exists(dest_parent):
+                    os.makedirs(dest_parent)
+                dest_parent_ready = True
             move_fn(abs_src_file, abs_dest_file)
             moved_files.append((rel_src_file, rel_dest_file))
             moved_files_out_of_this_dir = True
@@ -246,31 +245,29 @@ def copy_current_files_local_fs(
     copied_files = []  # type: List[str]
     exclude_dirs_re_list = (
         exclude_dirs_res if isinstance(exclude_dirs_res, list) else [exclude_dirs_res,]
-    )  # type: List[Pattern]
-    exclude_dirs_re_list.append(DOT_GIT_RE)
+    ) + [DOT_GIT_RE]  # type: List[Pattern]
     for (dirpath, dirnames, filenames) in os.walk(base_dir):
         assert dirpath.startswith(base_dir)
         rel_dirpath = dirpath[len(base_dir) + 1 :]
 
-        def join_to_rel_dirpath(f):
-            return join(rel_dirpath, f)
+        def join_rel_path(name):
+            return join(rel_dirpath, name) if len(rel_dirpath) > 0 else name
 
-        join_rel_path = join_to_rel_dirpath if len(rel_dirpath) > 0 else lambda f: f
         # find directories we should skip, as they represent results from
         # prior runs
-        skip = []
-        for (i, dir_name) in enumerate(dirnames):
-            abs_dirpath = join(dirpath, dir_name)
-            rel_dirpath = abs_dirpath[len(base_dir) + 1 :]
-            for exclude_dirs_re in exclude_dirs_re_list:
-                if exclude_dirs_re.match(rel_dirpath):
-                    skip.append(i)
-                    if verbose:
-                        print("Skipping directory %s" % rel_dirpath)
-        skip.reverse()
-        for i in skip:
-            del dirnames[i]
+        kept_dirnames = []
+        for dir_name in dirnames:
+            rel_subdirpath = join_rel_path(dir_name)
+            if any(r.match(rel_subdirpath) for r in exclude_dirs_re_list):
+                if verbose:
+                    print("Skipping directory %s" % rel_subdirpath)
+            else:
+                kept_dirnames.append(dir_name)
+        dirnames[:] = kept_dirnames
         # copy files to our new directory
+        # all the files in this directory go to the same destination directory,
+        # which we check for (and create) when we reach the first one
+        dest_parent_ready = False
         for f in filenames:
             rel_src_file = join_rel_path(f)
             if rel_src_file in exclude_files:
@@ -280,19 +277,21 @@ def copy_current_files_local_fs(
             assert not rel_src_file.startswith("snapshot/"), (
                 "Internal error: file %s should have been excluded from move" % rel_src_file
             )
-            rel_dest_file = join(rel_dest_root, join_rel_path(f))
+            rel_dest_file = join(rel_dest_root, rel_src_file)
             abs_src_file = join(dirpath, f)
-            abs_dest_file = join(abs_dest_root, join_rel_path(f))
+            abs_dest_file = join(abs_dest_root, rel_src_file)
             if verbose:
                 click.echo("[%s] Copying %s to %s" % (resource_name, rel_src_file, rel_dest_file))
                 click.echo("     Absolute %s => %s" % (abs_src_file, abs_dest_file))
-            dest_parent = os.path.dirname(abs_dest_file)
-            if not created_dir:
-                # lazily create the root directory
-                os.makedirs(abs_dest_root)
-                created_dir = True
-            if not exists(dest_parent):
-                os.makedirs(dest_parent)
+            if not dest_parent_ready:
+                if not created_dir:
+                    # lazily create the root directory
+                    os.makedirs(abs_dest_root)
+                    created_dir = True
+                dest_parent = os.path.dirname(abs_dest_file)
+                if not exists(dest_parent):
+                    os.makedirs(dest_parent)
+                dest_parent_ready = True
             copy_fn(abs_src_file, abs_dest_file)
             copied_files.append(rel_dest_file)
     return copied_files
@@ -317,7 +316,7 @@ def write_and_hash_file(write_fn, filename_template, verbose):
         else:
             # issue #21 - need to use a copy instead of a rename,
             # in case /tmp is on a different filesystem.
-            shutil.copyfile(tfilename, target_name)
+            copy_file(tfilename, target_name)
             return (hashval, target_name, True)
     finally:
         if exists(tfilename):
@@ -44,9 +44,24 @@ The module ``dataworkspaces.commands.COMMAND`` should look like this::
 
 """
 
-from typing import Dict, Any, Iterable, Optional, List, Tuple, Set, cast, Pattern, Union
+from typing import (
+    Dict,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    List,
+    Tuple,
+    Set,
+    cast,
+    Pattern,
+    Union,
+)
 
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
 import importlib
 import os.path
 import os
@@ -76,6 +91,7 @@ from dataworkspaces.utils.snapshot_utils import (
     make_re_pattern_for_dir_template,
 )
 from dataworkspaces.utils.file_utils import get_subpath_from_absolute
+from dataworkspaces.utils.json_utils import loads as json_loads
 from dataworkspaces.utils.lineage_utils import ResourceRef, LineageStore
 
 # Standin for a JSON object/dict. The value type is overly
@@ -98,6 +114,7 @@ class Workspace(metaclass=ABCMeta):
         self.batch = batch
         #: attribute: Print detailed logging (bool)
         self.verbose = verbose
+        self._workspace_real_path = None  # type: Optional[str]
 
     @abstractmethod
     def get_instance(self) -> str:
@@ -187,6 +204,15 @@ class Workspace(metaclass=ABCMeta):
         LOCAL_PARAM_DEFS[name].validate(value)
         self._set_local_param(name, value)
 
+    @contextmanager
+    def buffered_metadata_writes(self) -> Iterator[None]:
+        """Context manager for a batch of parameter or resource changes.
+        Backends may hold back writing their metadata until the end of the
+        block, so that each underlying file is written once. The default
+        implementation does not buffer anything.
+        """
+        yield
+
     @abstractmethod
     def get_scratch_directory(self) -> str:
         """Return an absolute path for the local scratch directory to be used
@@ -321,12 +347,15 @@ class Workspace(metaclass=ABCMeta):
             if f.has_local_state():
                 yield name
 
-    def get_names_for_resources_that_need_to_be_cloned(self) -> Iterable[str]:
+    def get_names_for_resources_that_need_to_be_cloned(
+        self, resource_names: Optional[Iterable[str]] = None
+    ) -> Iterable[str]:
         """Find all the resources that have local state, but no local parameters
         (not even an empty dict). These needed to be cloned. This is to be
-        called during the pull() command.
+        called during the pull() command. If resource_names is provided, only
+        those resources are checked.
         """
-        for name in self.get_resource_names():
+        for name in self.get_resource_names() if resource_names is None else resource_names:
             params = self._get_resource_params(name)
             resource_type = params["resource_type"]
             f = _get_resource_factory_by_resource_type(resource_type)
@@ -367,12 +396,8 @@ class Workspace(metaclass=ABCMeta):
         can override the base implementation and throw an exception.
         """
         real_local_path = os.path.realpath(proposed_local_path)
-        if self.get_workspace_local_path_if_any() is not None:
-            if (
-                os.path.realpath(cast(str, self.get_workspace_local_path_if_any()))
-                == real_local_path
-            ):
-                raise ConfigurationError("Cannot use the entire workspace as a resource local path")
+        if self.get_workspace_real_path_if_any() == real_local_path:
+            raise ConfigurationError("Cannot use the entire workspace as a resource local path")
         for r in self.get_resources():
             if not isinstance(r, LocalStateResourceMixin) or r.get_local_path_if_any() is None:
                 continue
@@ -451,6 +476,17 @@ class Workspace(metaclass=ABCMeta):
         """
         pass
 
+    def get_workspace_real_path_if_any(self) -> Optional[str]:
+        """Return the result of os.path.realpath() on the workspace's local path,
+        or None if there is no local path. The workspace does not move while
+        we are running, so this is only computed once.
+        """
+        if self._workspace_real_path is None:
+            local_path = self.get_workspace_local_path_if_any()
+            if local_path is not None:
+                self._workspace_real_path = os.path.realpath(local_path)
+        return self._workspace_real_path
+
     @abstractmethod
     def _get_local_scratch_space_for_resource(
         self, resource_name: str, create_if_not_present: bool = False
@@ -778,6 +814,15 @@ class FileResourceMixin(metaclass=ABCMeta):
         """
         pass
 
+    @contextmanager
+    def buffered_results_files(self) -> Iterator[None]:
+        """Context manager for a batch of add_results_file() calls. Resources
+        may hold back work for each file (e.g. a commit) until the end of the
+        block, so that it is done once for the whole batch. The default
+        implementation does not buffer anything.
+        """
+        yield
+
     @abstractmethod
     def upload_file(self, src_local_path: str, rel_dest_path: str) -> None:
         """Copy a local file to the specified path in the
@@ -953,6 +998,29 @@ def _get_resource_factory_by_resource_type(resource_type):
 ####################################################################
 #      Mixins for Synchronized and Centralized workspaces          #
 ####################################################################
+# Upper bound on the number of resources pushed or pulled at the same time
+MAX_PARALLEL_SYNCS = 8
+
+
+def _sync_resources_in_parallel(
+    resource_list: List[LocalStateResourceMixin], sync_fn: Callable[[LocalStateResourceMixin], None]
+) -> None:
+    """Call sync_fn (e.g. a push or pull) on each of the resources. The resources
+    are independent of each other and these calls mostly wait on subprocesses and
+    the network, so we run them in a thread pool. If any of the calls fail, we
+    re-raise the first failure, in resource list order, after all the calls have
+    finished.
+    """
+    if len(resource_list) <= 1:
+        for r in resource_list:
+            sync_fn(r)
+        return
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_SYNCS, len(resource_list))) as executor:
+        futures = [executor.submit(sync_fn, r) for r in resource_list]
+    for future in futures:
+        future.result()
+
+
 class SyncedWorkspaceMixin(metaclass=ABCMeta):
     """This mixin is for workspaces that support synchronizing with a master
     copy via push/pull operations.
@@ -984,7 +1052,7 @@ class SyncedWorkspaceMixin(metaclass=ABCMeta):
         for r in resource_list:
             assert isinstance(r, Resource)
             print("[pull] pulling resource %s" % r.name)
-            r.pull()
+        _sync_resources_in_parallel(resource_list, lambda r: r.pull())
         print("[pull] all resources pulled successfully.")
 
 
@@ -1021,7 +1089,7 @@ class SyncedWorkspaceMixin(metaclass=ABCMeta):
 
         for r in resource_list:
             print("[push] pushing resource %s" % cast(Resource, r).name)
-            r.push()
+        _sync_resources_in_parallel(resource_list, lambda r: r.push())
         print("[push] all resources pushed successfully.")
 
     @abstractmethod
@@ -1051,9 +1119,7 @@ class CentralWorkspaceMixin(metaclass=ABCMeta):
         """
         pass
         self._pull_resources_precheck(resource_list)
-
-        for r in resource_list:
-            r.pull()
+        _sync_resources_in_parallel(resource_list, lambda r: r.pull())
 
     @abstractmethod
     def get_resources_that_need_to_be_cloned(self) -> List[str]:
@@ -1072,9 +1138,7 @@ class CentralWorkspaceMixin(metaclass=ABCMeta):
         """Upload resource updates to remote origin.
         """
         self._push_resources_precheck(resource_list)
-
-        for r in resource_list:
-            r.push()
+        _sync_resources_in_parallel(resource_list, lambda r: r.push())
 
 
 ####################################################################
@@ -1176,6 +1240,13 @@ class SnapshotWorkspaceMixin(metaclass=ABCMeta):
             if isinstance(r, SnapshotResourceMixin):
                 r.snapshot_precheck()
 
+    def _prepare_resources_for_snapshot(self, current_resources: Iterable[Resource]) -> None:
+        """Called by snapshot() after the results files have been moved and just
+        before snapshot() is called on each resource. Backends can override this
+        to do work for several resources at once. The default does nothing.
+        """
+        pass
+
     @abstractmethod
     def save_snapshot_metadata_and_manifest(
         self, metadata: SnapshotMetadata, manifest: bytes
@@ -1250,6 +1321,8 @@ class SnapshotWorkspaceMixin(metaclass=ABCMeta):
                         rel_dest_root, exclude_files, exclude_dirs_re
                     )
 
+        self._prepare_resources_for_snapshot(current_resources)
+
         # Take the actual snapshot
         manifest = []
         map_of_restore_hashes = {}  # type: Dict[str,Optional[str]]
@@ -1296,10 +1369,14 @@ class SnapshotWorkspaceMixin(metaclass=ABCMeta):
             # include everything from the snapshot. Since results resources are
             # additive, we won't be missing anything if we
             # restore to this snapshot.
-            self.write_result_lineage_for_snapshot(
-                current_resources, metadata.relative_destination_path
-            )
-            self.write_export_lineage_for_snapshot(current_resources)
+            with ExitStack() as stack:
+                for r in current_resources:
+                    if isinstance(r, FileResourceMixin):
+                        stack.enter_context(r.buffered_results_files())
+                self.write_result_lineage_for_snapshot(
+                    current_resources, metadata.relative_destination_path
+                )
+                self.write_export_lineage_for_snapshot(current_resources)
 
             # For all the results resources for which we moved the files to a
             # snapshot-specific subdirectory, we need to clear the lineage.
@@ -1403,7 +1480,7 @@ class SnapshotWorkspaceMixin(metaclass=ABCMeta):
         resource names resource parameters.
         """
         raw_data = self._get_snapshot_manifest_as_bytes(hash_val)
-        return json.loads(raw_data.decode("utf-8"))
+        return json_loads(raw_data)
 
     @abstractmethod
     def list_snapshots(
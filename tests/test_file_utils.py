@@ -17,7 +17,7 @@ try:
 except ImportError:
     sys.path.append(os.path.abspath(".."))
 
-from dataworkspaces.utils.file_utils import safe_rename
+from dataworkspaces.utils.file_utils import safe_rename, write_file_atomically, copy_file
 
 class TestFileUtils(unittest.TestCase):
     def setUp(self):
@@ -48,6 +48,30 @@ class TestFileUtils(unittest.TestCase):
             if os.path.exists(testfile.name):
                 os.remove(testfile.name)
 
+    def test_write_file_atomically(self):
+        dest = os.path.join(TEMPDIR, 'data.json')
+        with open(dest, 'w') as f:
+            f.write('old contents\n')
+        write_file_atomically(dest, b'new contents\n')
+        with open(dest, 'r') as f:
+            self.assertEqual('new contents\n', f.read())
+        self.assertEqual(['data.json'], os.listdir(TEMPDIR))
+
+    def test_copy_file(self):
+        src = os.path.join(TEMPDIR, 'src.bin')
+        dest = os.path.join(TEMPDIR, 'dest.bin')
+        data = os.urandom(3*1024*1024 + 17)
+        with open(src, 'wb') as f:
+            f.write(data)
+        with open(dest, 'wb') as f:
+            f.write(b'x'*(4*1024*1024)) # longer than src, should be truncated
+        copy_file(src, dest)
+        with open(dest, 'rb') as f:
+            self.assertEqual(data, f.read())
+        with self.assertRaises(shutil.SameFileError):
+            copy_file(src, src)
+        with open(src, 'rb') as f:
+            self.assertEqual(data, f.read())
 
 
 if __name__ == '__main__':
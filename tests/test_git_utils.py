@@ -26,7 +26,10 @@ from dataworkspaces.utils.git_utils import \
     get_local_head_hash, commit_changes_in_repo_subdir,\
     checkout_subdir_and_apply_commit, GIT_EXE_PATH,\
     get_subdirectory_hash, get_json_file_from_remote,\
-    git_remove_subtree, git_remove_file
+    git_remove_subtree, git_remove_file, cached_git_queries, GitBlobReader,\
+    get_current_branch, switch_git_branch_if_needed, git_commit_exists,\
+    git_add_all, get_git_version
+import dataworkspaces.utils.git_utils as git_utils
 
 
 def makefile(relpath, contents):
@@ -189,6 +192,15 @@ class TestIsDirty(BaseCase):
         self.assertTrue(is_git_staging_dirty(REPODIR))
         self.assertFalse(is_git_staging_dirty(REPODIR, 'subdir'))
 
+    def test_git_is_dirty_cached(self):
+        """Within cached_git_queries(), the first answer for a repo is reused.
+        """
+        with cached_git_queries():
+            self.assertFalse(is_git_dirty(REPODIR))
+            makefile('subdir/untracked.txt', 'this is untracked')
+            self.assertFalse(is_git_dirty(REPODIR))
+        self.assertTrue(is_git_dirty(REPODIR))
+
 
 class TestCommit(BaseCase):
     def test_commit(self):
@@ -470,6 +482,105 @@ class TestGetSubdirectoryHash(unittest.TestCase):
         self.assertTrue('Makefile' in files)
 
 
+class TestGitBlobReader(BaseCase):
+    def test_read(self):
+        makefile('data.json', '{"foo": "bar"}\n')
+        self._git_add(['data.json'])
+        self._run(['commit', '-m', 'initial version'])
+        hashval = get_local_head_hash(REPODIR)
+        with GitBlobReader(REPODIR) as reader:
+            self.assertEqual(b'{"foo": "bar"}\n', reader.read(hashval, 'data.json'))
+            self.assertIsNone(reader.read(hashval, 'missing.json'))
+            self.assertIsNone(reader.read('f'*40, 'data.json'))
+            self.assertEqual(b'{"foo": "bar"}\n', reader.read('HEAD', 'data.json'))
+            self.assertTrue(reader.has_commit(hashval))
+            self.assertFalse(reader.has_commit('f'*40))
+
+
+class TestCommitExists(BaseCase):
+    def test_loose_and_packed(self):
+        makefile('README.txt', 'this is a test\n')
+        self._git_add(['README.txt'])
+        self._run(['commit', '-m', 'initial version'])
+        hashval = get_local_head_hash(REPODIR)
+        self.assertTrue(git_commit_exists(REPODIR, hashval))
+        self._run(['gc', '--quiet'])
+        self.assertFalse(exists(join(REPODIR, '.git/objects', hashval[:2], hashval[2:])))
+        self.assertTrue(git_commit_exists(REPODIR, hashval))
+        self.assertFalse(git_commit_exists(REPODIR, 'f'*40))
+        with cached_git_queries():
+            self.assertTrue(git_commit_exists(REPODIR, hashval[:10]))
+            self.assertFalse(git_commit_exists(REPODIR, 'f'*40))
+
+
+class TestGitAddAll(BaseCase):
+    def _staged_files(self):
+        r = subprocess.run([GIT_EXE_PATH, 'diff', '--cached', '--no-renames', '--name-status', '-z'],
+                           cwd=REPODIR, stdout=subprocess.PIPE, encoding='utf-8')
+        fields = r.stdout.split('\0')[:-1]
+        return set(zip(fields[0::2], fields[1::2]))
+
+    def _check_add_all(self):
+        makefile('modified.txt', 'v1\n')
+        makefile('deleted.txt', 'v1\n')
+        self._git_add(['modified.txt', 'deleted.txt'])
+        self._run(['commit', '-m', 'initial version'])
+        makefile('modified.txt', 'v2\n')
+        os.remove(join(REPODIR, 'deleted.txt'))
+        makefile('new file.txt', 'v1\n')
+        makefile('[literal].txt', 'v1\n')
+        makefile('untouched.txt', 'v1\n')
+        git_add_all(REPODIR, ['modified.txt', 'deleted.txt', 'new file.txt', '[literal].txt'])
+        self.assertEqual(set([('M', 'modified.txt'), ('D', 'deleted.txt'), ('A', 'new file.txt'),
+                              ('A', '[literal].txt')]),
+                         self._staged_files())
+
+    def test_add_all(self):
+        self._check_add_all()
+
+    def test_add_all_old_git(self):
+        """Older gits do not support --pathspec-from-file, so we pass the
+        paths as arguments. A small limit forces several git add calls.
+        """
+        saved = (git_utils._git_version, git_utils.MAX_PATHS_ARG_CHARS)
+        git_utils._git_version = (2, 24, 0)
+        git_utils.MAX_PATHS_ARG_CHARS = 20
+        try:
+            self._check_add_all()
+        finally:
+            (git_utils._git_version, git_utils.MAX_PATHS_ARG_CHARS) = saved
+        self.assertGreaterEqual(get_git_version(), (1,))
+
+
+class TestBranch(BaseCase):
+    def test_switch_branch_if_needed(self):
+        makefile('README.txt', 'this is a test\n')
+        self._git_add(['README.txt'])
+        self._run(['commit', '-m', 'initial version'])
+        self._run(['branch', '-M', 'master'])
+        self._run(['branch', 'other'])
+        self.assertEqual('master', get_current_branch(REPODIR))
+        switch_git_branch_if_needed(REPODIR, 'master', True)
+        self.assertEqual('master', get_current_branch(REPODIR))
+        switch_git_branch_if_needed(REPODIR, 'other', True)
+        self.assertEqual('other', get_current_branch(REPODIR))
+        self._run(['checkout', '--detach'])
+        self.assertIsNone(get_current_branch(REPODIR))
+        switch_git_branch_if_needed(REPODIR, 'master', True)
+        self.assertEqual('master', get_current_branch(REPODIR))
+
+
+class TestRemoteOrigin(BaseCase):
+    def test_get_remote_origin(self):
+        from dataworkspaces.resources.git_resource import get_remote_origin
+        self.assertIsNone(get_remote_origin(REPODIR))
+        self._run(['remote', 'add', 'origin', 'git@example.com:test/repo.git'])
+        self.assertEqual('git@example.com:test/repo.git', get_remote_origin(REPODIR))
+        # quoted values are handled by git rather than parsed by us
+        self._run(['config', 'remote.origin.url', 'https://example.com/a "b".git'])
+        self.assertEqual('https://example.com/a "b".git', get_remote_origin(REPODIR))
+
+
 class TestMisc(unittest.TestCase):
     def test_get_json_file_from_remote(self):
         """We get the data.json file in this directory from the origin repo
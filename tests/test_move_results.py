@@ -21,7 +21,7 @@ from dataworkspaces.utils.snapshot_utils import \
     move_current_files_local_fs, make_re_pattern_for_dir_template,\
     expand_dir_template
 from dataworkspaces.resources.git_resource import \
-    git_move_and_add, is_file_tracked_by_git
+    git_move_and_add, git_add_moved_files, is_file_tracked_by_git
 
 TEMPDIR=os.path.abspath(os.path.expanduser(__file__)).replace('.py', '_data')
 EXCLUDE_DIRS_RE=re.compile(r'^.+\-.+\/.+\/.+\-\d\d\:\d\d$')
@@ -144,6 +144,22 @@ class TestMoveResults(unittest.TestCase):
         self._assert_exists('2018-09/19/jfischer-11:50/subdir/output.csv')
         self._assert_exists('results.csv')
 
+    def test_move_nested_subdirs(self):
+        """Files in a directory that also has subdirectories should keep
+        their relative path."""
+        os.makedirs(os.path.join(TEMPDIR, 'a/b'))
+        makefile('a/f.txt')
+        makefile('a/b/g.txt')
+        mapping = move_current_files_local_fs('test',
+                                              TEMPDIR, '2018-09/19/jfischer-11:45',
+                                              set(), EXCLUDE_DIRS_RE,
+                                              verbose=True)
+        self.assertEqual({'a/f.txt':'2018-09/19/jfischer-11:45/a/f.txt',
+                          'a/b/g.txt':'2018-09/19/jfischer-11:45/a/b/g.txt'},
+                         dict(mapping))
+        self._assert_exists('2018-09/19/jfischer-11:45/a/f.txt')
+        self._assert_exists('2018-09/19/jfischer-11:45/a/b/g.txt')
+
 
 class TestMoveResultsGit(unittest.TestCase):
     def setUp(self):
@@ -210,6 +226,26 @@ class TestMoveResultsGit(unittest.TestCase):
         self._assert_exists('2018-09/19/jfischer-11:50/subdir/output.csv')
         self._assert_exists('results.csv')
 
+    def test_move_and_add_batch(self):
+        makefile('results.csv')
+        makefile('test.log')
+        subprocess.check_call(['/usr/bin/git', 'add', 'test.log'], cwd=TEMPDIR)
+        subprocess.check_call(['/usr/bin/git', '-c', 'user.name=test',
+                               '-c', 'user.email=test@example.com',
+                               'commit', '-m', 'initial'], cwd=TEMPDIR)
+        os.mkdir(os.path.join(TEMPDIR, 'subdir'))
+        makefile('subdir/output.csv')
+        mapping = move_current_files_local_fs('test',
+                                              TEMPDIR, '2018-09/19/jfischer-11:45',
+                                              set(['results.csv']),
+                                              EXCLUDE_DIRS_RE,
+                                              verbose=True)
+        git_add_moved_files(mapping, TEMPDIR, True)
+        self._assert_exists('2018-09/19/jfischer-11:45/test.log', True)
+        self._assert_exists('2018-09/19/jfischer-11:45/subdir/output.csv', True)
+        self.assertFalse(is_file_tracked_by_git('test.log', TEMPDIR, True))
+        self.assertFalse(is_file_tracked_by_git('results.csv', TEMPDIR, True))
+
 
 
 
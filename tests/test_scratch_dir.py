@@ -45,6 +45,38 @@ class TestScratchDir(BaseCase):
         self._assert_file_not_git_tracked(f1path)
         self._assert_file_not_git_tracked(f2path)
 
+    def test_leftover_tmp_files_not_in_snapshot(self):
+        """A temporary file left behind by an interrupted metadata write
+        must not be committed.
+        """
+        self._setup_initial_repo(create_resources='code')
+        tmppath = join(WS_DIR, '.dataworkspace/local_params.json.0123abcd.tmp')
+        with open(tmppath, 'w') as f:
+            f.write("{}\n")
+        self._run_dws(['snapshot', 's1'])
+        self._assert_file_git_tracked(join(WS_DIR, '.dataworkspace/resources.json'))
+        self._assert_file_not_git_tracked(tmppath)
+
+    def test_leftover_tmp_files_in_older_workspace(self):
+        """Workspaces created before temporary files were gitignored do not
+        have the entry in .dataworkspace/.gitignore. It should be added before
+        the next commit, so that a leftover temporary file is not committed.
+        """
+        self._setup_initial_repo(create_resources='code')
+        gitignore_path = join(WS_DIR, '.dataworkspace/.gitignore')
+        with open(gitignore_path, 'r') as f:
+            entries = [line for line in f if line.strip() != '*.tmp']
+        with open(gitignore_path, 'w') as f:
+            f.writelines(entries)
+        self._run_git(['commit', '-m', 'gitignore without *.tmp', '.dataworkspace/.gitignore'])
+        tmppath = join(WS_DIR, '.dataworkspace/local_params.json.0123abcd.tmp')
+        with open(tmppath, 'w') as f:
+            f.write("{}\n")
+        self._run_dws(['snapshot', 's1'])
+        self._assert_file_not_git_tracked(tmppath)
+        with open(gitignore_path, 'r') as f:
+            self.assertIn('*.tmp', [line.strip() for line in f])
+
     def test_scratch_in_subdirectory(self):
         scratch_dir = join(WS_DIR, 'scratch_parent/scratch')
         self._setup_initial_repo(scratch_dir=scratch_dir)
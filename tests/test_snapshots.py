@@ -28,6 +28,7 @@ except ImportError:
 
 from dataworkspaces.utils.git_utils import GIT_EXE_PATH
 from dataworkspaces.utils.subprocess_utils import find_exe
+from dataworkspaces.errors import ConfigurationError
 
 class BaseCase(unittest.TestCase):
     def setUp(self):
@@ -120,6 +121,63 @@ class TestSnapshots(BaseCase):
         if not got_error:
             self.fail("Did not get an error when calling snapshot for tag S1 a second time")
 
+    def test_remove_tag_keeps_other_tags(self):
+        """Removing one tag from a snapshot should leave its other tags alone.
+        """
+        self._run_dws(['init', '--create-resources=code,results'])
+        with open(join(CODE_DIR, 'test.py'), 'w') as f:
+            f.write("print('this is a test')\n")
+        self._run_dws(['snapshot', '-m', "'first tag'", 'S1'])
+        # no changes, so this just adds a second tag to the same snapshot
+        self._run_dws(['snapshot', '-m', "'first tag'", 'S2'])
+        from dataworkspaces.workspace import find_and_load_workspace
+        ws = find_and_load_workspace(True, False, WS_DIR)
+        md = ws.get_snapshot_by_tag('S1')
+        self.assertEqual(['S1', 'S2'], md.tags)
+        ws.remove_tag_from_snapshot(md.hashval, 'S1')
+        ws = find_and_load_workspace(True, False, WS_DIR)
+        self.assertEqual(['S2'], ws.get_snapshot_metadata(md.hashval).tags)
+        self.assertEqual(md.hashval, ws.get_snapshot_by_tag('S2').hashval)
+
+    def test_lookup_by_hash(self):
+        """Full and partial hash lookups on a freshly loaded workspace
+        should find the same snapshot as the tag lookup.
+        """
+        self._run_dws(['init', '--create-resources=code,results'])
+        with open(join(CODE_DIR, 'test.py'), 'w') as f:
+            f.write("print('this is a test')\n")
+        self._run_dws(['snapshot', '-m', "'first tag'", 'S1'])
+        from dataworkspaces.workspace import find_and_load_workspace
+        hashval = find_and_load_workspace(True, False, WS_DIR).get_snapshot_by_tag('S1').hashval
+        ws = find_and_load_workspace(True, False, WS_DIR)
+        self.assertEqual(['S1'], ws.get_snapshot_by_tag_or_hash(hashval).tags)
+        ws = find_and_load_workspace(True, False, WS_DIR)
+        self.assertEqual(hashval, ws.get_snapshot_by_tag_or_hash(hashval[0:8]).hashval)
+        self.assertRaises(ConfigurationError, ws.get_snapshot_by_tag_or_hash, 'f'*40)
+
+
+    def test_results_hash_excludes_readme(self):
+        """Files left in the results directory (e.g. a README) are not part of
+        the results resource's hash, even when there are other subdirectory
+        resources whose changes are committed ahead of the snapshot.
+        """
+        self._run_dws(['init', '--create-resources=code,source-data,results'])
+        with open(join(CODE_DIR, 'test.py'), 'w') as f:
+            f.write("print('this is a test')\n")
+        with open(join(RESULTS_DIR, 'README.md'), 'w') as f:
+            f.write("Results go here\n")
+        self._write_results({'accuracy':0.95})
+        self._run_dws(['snapshot', '-m', "'first snapshot'", 'S1'])
+        from dataworkspaces.workspace import find_and_load_workspace
+        ws = find_and_load_workspace(True, False, WS_DIR)
+        manifest = ws.get_snapshot_manifest(ws.get_snapshot_by_tag('S1').hashval)
+        results_hash = [r['hash'] for r in manifest if r['name']=='results'][0]
+        self._run_git(['rm', '--quiet', '--cached', 'results/README.md'])
+        r = subprocess.run([GIT_EXE_PATH, 'write-tree', '--prefix=results/'], cwd=WS_DIR,
+                           stdout=subprocess.PIPE, encoding='utf-8', check=True)
+        self.assertEqual(r.stdout.strip(), results_hash)
+
+
 class TestDeleteSnapshot(BaseCase):
     def test_delete_snapshot(self):
         self._run_dws(['init', '--hostname=test', '--create-resources=code,results'])